@@ -1,5 +1,11 @@
 import ccxt
+from ccxt.base.decimal_to_precision import decimal_to_precision, TRUNCATE
 import logging
+import sys
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
 
 class GateIOAPIClient:
     def __init__(self, config):
@@ -8,69 +14,116 @@ class GateIOAPIClient:
         self.key = self.config['key']
         self.secret = self.config['secret']
         self.base_url = self.config['base_url']
-        self.symbol = self.trading_config['currency_pair'].replace("_", "/")
-        
+        self.symbol = sys.intern(self.trading_config['currency_pair'].replace("_", "/"))
+
+        fixed_usdt = self.trading_config.get('buy', {}).get('fixed_usdt')
+        if fixed_usdt is None:
+            raise ValueError("fixed_usdt is not set in the configuration for buy orders.")
+        self._fixed_usdt = float(fixed_usdt)
+
+        # Keep-alive pool so REST calls (incl. amendment fallbacks) reuse TLS connections
+        pool_size = self.config.get('http_pool_size') or self.trading_config.get('parallel_instances') or 10
+        session = requests.Session()
+        session.mount('https://', HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size * 2,
+            max_retries=0
+        ))
+
         self.exchange = ccxt.gateio({
             'apiKey': self.key,
             'secret': self.secret,
             'enableRateLimit': True,
+            # One throttler per client; every order worker shares this instance
+            'rateLimit': self.config.get('rate_limit_ms', 100),
+            'session': session,
         })
+        self.exchange.headers['Connection'] = 'keep-alive'
+
+        # Resolve market and precision settings once instead of per order
+        self.exchange.load_markets()
+        self._market = self.exchange.market(self.symbol)
+        self._market_id = self._market['id']
+        self._amount_precision = self._market['precision']['amount']
+        self._precision_mode = self.exchange.precisionMode
+        self._padding_mode = self.exchange.paddingMode
+        self._patch_order = self.exchange.privateSpotPatchOrdersOrderId
+
+        # Short-lived open-orders snapshot shared by concurrent callers (single-flight)
+        self._open_orders_ttl = 0.1
+        self._open_orders_cache = (0.0, None)
+        self._open_orders_lock = threading.Lock()
+
         self.logger = logging.getLogger("GateIOAPIClient")
-        self.logger.info(f"Initialized API client for {self.symbol}")
+        self.logger.info("Initialized API client for %s", self.symbol)
+
+    def _amount_to_precision(self, amount):
+        result = decimal_to_precision(
+            amount, TRUNCATE, self._amount_precision,
+            self._precision_mode, self._padding_mode
+        )
+        if result == '0':
+            raise ValueError(f"Amount {amount} is below the market's amount precision.")
+        return result
 
     def get_open_orders(self):
-        self.logger.debug("Fetching open orders...")
-        try:
-            open_orders = self.exchange.fetch_open_orders(self.symbol)
-            self.logger.debug(f"Open orders: {open_orders}")
-            return open_orders
-        except Exception as e:
-            self.logger.error(f"API Error (fetching open orders): {str(e)}")
-            return []
+        with self._open_orders_lock:
+            ts, cached = self._open_orders_cache
+            # Callers get their own list so none of them can mutate the shared snapshot
+            if cached is not None and time.monotonic() - ts < self._open_orders_ttl:
+                return list(cached)
+
+            self.logger.debug("Fetching open orders...")
+            try:
+                open_orders = self.exchange.fetch_open_orders(self.symbol)
+                self._open_orders_cache = (time.monotonic(), open_orders)
+                if self.logger.isEnabledFor(logging.DEBUG):
+                    self.logger.debug(f"Open orders: {open_orders}")
+                return list(open_orders)
+            except Exception as e:
+                self.logger.error(f"API Error (fetching open orders): {str(e)}")
+                return []
 
     def cancel_order(self, order_id):
-        self.logger.debug(f"Attempting to cancel order: {order_id}")
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(f"Attempting to cancel order: {order_id}")
         try:
             self.exchange.cancel_order(order_id, self.symbol)
-            self.logger.info(f"Cancelled order {order_id}.")
+            self.logger.info("Cancelled order %s.", order_id)
             return True
         except Exception as e:
             self.logger.error(f"Cancel Error for order {order_id}: {str(e)}")
             return False
 
     def calculate_order_amount(self, side, limit_price, custom_amount=None):
-        self.logger.debug(f"Calculating order amount for side: {side} at limit price: {limit_price}")
-        try:
-            if side == 'buy':
-                fixed_usdt = self.trading_config['buy'].get('fixed_usdt')
-                if fixed_usdt is None:
-                    raise ValueError("fixed_usdt is not set in the configuration for buy orders.")
-                amount = float(fixed_usdt) / limit_price
-                self.logger.debug(f"Calculated fixed buy amount (base currency): {amount}")
-                return amount
-            elif side == 'sell':
-                if custom_amount is not None:
-                    self.logger.debug(f"Using custom sell amount: {custom_amount}")
-                    return custom_amount
-                else:
-                    raise ValueError("No custom sell amount provided for sell order.")
-            else:
-                raise ValueError("Invalid side specified")
-        except Exception as e:
-            self.logger.error(f"Order amount calculation error: {str(e)}")
+        if side == 'buy':
+            if not limit_price:
+                self.logger.error(f"Order amount calculation error: invalid limit price {limit_price} for buy order.")
+                return 0
+            amount = self._fixed_usdt / limit_price
+        elif side == 'sell':
+            if custom_amount is None:
+                self.logger.error("Order amount calculation error: No custom sell amount provided for sell order.")
+                return 0
+            amount = custom_amount
+        else:
+            self.logger.error(f"Order amount calculation error: Invalid side specified ({side})")
             return 0
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(f"Calculated {side} amount at limit price {limit_price}: {amount}")
+        return amount
 
     def place_stop_limit_order(self, order_type, trigger_price, limit_price, custom_amount=None):
-        self.logger.info(f"Placing {order_type} stop-limit order with trigger: {trigger_price} and limit: {limit_price}")
+        self.logger.info("Placing %s stop-limit order with trigger: %s and limit: %s", order_type, trigger_price, limit_price)
         try:
             amount = custom_amount if custom_amount is not None else self.calculate_order_amount(order_type, limit_price)
             if amount <= 0:
                 self.logger.error("Invalid order amount calculated; order will not be placed.")
                 return None
 
-            market = self.exchange.market(self.symbol)
-            amount = self.exchange.amount_to_precision(self.symbol, amount)
-            self.logger.debug(f"Formatted amount: {amount}")
+            amount = self._amount_to_precision(amount)
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug(f"Formatted amount: {amount}")
 
             params = {
                 'stopPrice': trigger_price,
@@ -91,31 +144,30 @@ class GateIOAPIClient:
                 price=limit_price,
                 params=params
             )
-            self.logger.info(f"Order placed: {order}")
+            self.logger.info("Order placed: %s", order)
             return order
         except Exception as e:
             self.logger.error(f"Order failed: {str(e)}")
             return None
 
     def place_market_order(self, order_type, amount):
-        self.logger.info(f"Placing market {order_type} order for amount: {amount}")
+        self.logger.info("Placing market %s order for amount: %s", order_type, amount)
         try:
-            market = self.exchange.market(self.symbol)
-            amount = self.exchange.amount_to_precision(self.symbol, amount)
+            amount = self._amount_to_precision(amount)
             order = self.exchange.create_order(
                 symbol=self.symbol,
                 type='market',
                 side=order_type,
                 amount=amount
             )
-            self.logger.info(f"Market order placed: {order}")
+            self.logger.info("Market order placed: %s", order)
             return order
         except Exception as e:
             self.logger.error(f"Market order failed: {str(e)}")
             return None
 
     def amend_stop_limit_order(self, order_id, order_type, new_trigger, new_limit, custom_amount=None):
-        self.logger.info(f"Amending order {order_id} via REST with new trigger: {new_trigger} and new limit: {new_limit}")
+        self.logger.info("Amending order %s via REST with new trigger: %s and new limit: %s", order_id, new_trigger, new_limit)
         try:
             if order_type == 'buy':
                 amount = custom_amount if custom_amount is not None else self.calculate_order_amount('buy', new_limit)
@@ -123,15 +175,16 @@ class GateIOAPIClient:
                 amount = None
 
             params = {
+                "order_id": order_id,
+                "currency_pair": self._market_id,
                 "price": new_limit,
                 "stopPrice": new_trigger,
             }
             if order_type == 'buy' and amount is not None:
                 params["amount"] = amount
 
-            url = f"{self.base_url}/spot/orders/{order_id}"
-            order = self.exchange.request(url, "PATCH", params)
-            self.logger.info(f"Order amended via REST: {order}")
+            order = self._patch_order(params)
+            self.logger.info("Order amended via REST: %s", order)
             return order
         except Exception as e:
             self.logger.error(f"REST amendment failed for order {order_id}: {str(e)}")
@@ -1,10 +1,20 @@
 import logging
 import time
 import math
+import random
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain, repeat
 
-def round_up_to_one_significant(x):
-    if x == 0:
-        return 0
+# Powers of ten and their 1..10 multiples for exponents -12..5, indexed by exponent + 12
+_POW10_MIN = -12
+_POW10 = tuple(10 ** e for e in range(_POW10_MIN, 6))
+_ROUND_UP = tuple(
+    tuple(d * (10 ** e) for d in range(10)) + (10 ** (e + 1),)
+    for e in range(_POW10_MIN, 6)
+)
+_LOG10_2 = math.log10(2)
+
+def _round_up_to_one_significant_log10(x):
     exponent = math.floor(math.log10(abs(x)))
     factor = 10 ** exponent
     first_digit = int(abs(x) / factor)
@@ -15,6 +25,19 @@ def round_up_to_one_significant(x):
             exponent += 1
     return first_digit * (10 ** exponent)
 
+def round_up_to_one_significant(x):
+    if x == 0:
+        return 0
+    x = abs(x)
+    # Decimal exponent estimated from the binary one; off by at most one, fixed by a single compare
+    i = math.floor(math.frexp(x)[1] * _LOG10_2) - _POW10_MIN
+    if not 0 < i < len(_POW10):
+        return _round_up_to_one_significant_log10(x)
+    i -= x < _POW10[i]
+    steps = _ROUND_UP[i]
+    first_digit = int(x / _POW10[i])
+    return steps[first_digit + (x > steps[first_digit])]
+
 class ParallelOrderManager:
     def __init__(self, api, state, config, ws_manager):
         self.api = api
@@ -25,21 +48,53 @@ class ParallelOrderManager:
         self.max_retries = config['api'].get('max_ws_retries', 3)
         self.retry_interval = config['api'].get('ws_retry_initial_interval', 0.1)
         self.retry_multiplier = config['api'].get('ws_retry_multiplier', 2)
-        
-    def _should_skip_instance(self, instance_index):
-        return instance_index in self.state.pending_actions
+        self._backoff_cap = config['api'].get('ws_retry_cap', 5.0)
+        self._retry_budget = config['api'].get('ws_retry_budget', 10.0)
+        self._fee_rate = float(config['trading'].get('sell_trading_fee', 0.001))
+        self._sell_amount_cache = (None, None)  # (last_buy_amount, fee-adjusted sell amount)
+        # A claim older than this is treated as lost (failed call, missed confirmation) and reclaimable
+        self._pending_timeout_ns = int(config['trading'].get('pending_timeout', 30) * 1e9)
+        # Instance -> connection routing is fixed for the manager's lifetime; resolve it once
+        self._ws_clients = [ws_manager.get_ws_client(i) for i in range(ws_manager.total_instances)]
+        # One worker per instance so per-instance round trips overlap instead of serialising
+        self.executor = ThreadPoolExecutor(
+            max_workers=max(1, ws_manager.total_instances),
+            thread_name_prefix="ParallelOrder"
+        )
+
+    def _is_pending(self, slot, now_ns):
+        return slot.pending and now_ns - slot.pending_since < self._pending_timeout_ns
+
+    def _claim_slot(self, slot):
+        # Unlocked read first: a pending instance is skipped without touching the mutex
+        now_ns = time.monotonic_ns()
+        if self._is_pending(slot, now_ns) or not slot.lock.acquire(blocking=False):
+            return False
+        try:
+            if self._is_pending(slot, now_ns):
+                return False
+            slot.pending = True
+            slot.pending_since = now_ns
+            return True
+        finally:
+            slot.lock.release()
 
     def _generate_order_parameters(self, instance_index, get_market_price_func, 
-                                  calculate_prices_func, order_type):
-        current_price = get_market_price_func()
+                                  calculate_prices_func, order_type, current_price=None):
+        if current_price is None:
+            current_price = get_market_price_func()
         trigger, limit = calculate_prices_func(current_price, order_type, instance_index)
         
         amount = None
         if order_type == 'sell':
-            if self.state.last_buy_amount:
-                fee_rate = self.config['trading'].get('sell_trading_fee', 0.001)
-                raw_fee = self.state.last_buy_amount * fee_rate
-                amount = self.state.last_buy_amount - round_up_to_one_significant(raw_fee)
+            last_buy_amount = self.state.last_buy_amount
+            if last_buy_amount:
+                # Only changes once per buy fill; retries and sibling instances reuse it
+                cached_buy_amount, amount = self._sell_amount_cache
+                if cached_buy_amount != last_buy_amount:
+                    raw_fee = last_buy_amount * self._fee_rate
+                    amount = last_buy_amount - round_up_to_one_significant(raw_fee)
+                    self._sell_amount_cache = (last_buy_amount, amount)
         else:
             amount = self.api.calculate_order_amount(order_type, limit)
             
@@ -50,31 +105,34 @@ class ParallelOrderManager:
             'amount': amount
         }
 
-    def _ws_operation_with_retry(self, operation, instance_index, get_market_price_func,
-                                calculate_prices_func, order_type, is_amendment=False,
-                                previous_params=None):
+    def _ws_operation_with_retry(self, ws_method, order_ref, instance_index, get_market_price_func,
+                                calculate_prices_func, order_type):
+        # ws_method is a bound place/amend method called as ws_method(order_ref, trigger, limit, amount),
+        # where order_ref is the side for placements and the client_order_id for amendments
+        generate_params = self._generate_order_parameters
+        deadline = time.monotonic() + self._retry_budget
         for attempt in range(self.max_retries + 1):
             try:
-                params = self._generate_order_parameters(
+                params = generate_params(
                     instance_index, get_market_price_func,
                     calculate_prices_func, order_type
                 )
-                
-                if is_amendment and previous_params:
-                    params.update(previous_params)
 
-                result = operation(**params)
-                
                 if order_type == 'buy' and params['amount'] <= 0:
                     raise ValueError("Invalid buy amount after recalculation")
-                    
+
+                result = ws_method(order_ref, params['trigger'], params['limit'], params['amount'])
                 return result, params
                 
             except Exception as e:
                 if attempt == self.max_retries:
                     raise
-                sleep_time = self.retry_interval * (self.retry_multiplier ** attempt)
-                self.logger.debug(f"Retry {attempt+1}/{self.max_retries} in {sleep_time:.2f}s")
+                # Capped, jittered backoff so instances don't retry in lockstep
+                base = min(self._backoff_cap, self.retry_interval * (self.retry_multiplier ** attempt))
+                sleep_time = base * (0.5 + random.random())
+                if time.monotonic() + sleep_time > deadline:
+                    raise
+                self.logger.debug("Retry %d/%d in %.2fs", attempt + 1, self.max_retries, sleep_time)
                 time.sleep(sleep_time)
                 
         return None, None
@@ -105,76 +163,136 @@ class ParallelOrderManager:
             self.logger.error(f"REST {operation_name} failed: {str(e)}")
             return None
 
+    def _group_by_ws_client(self, instance_indices):
+        # Claim each instance and bucket it under the connection that carries it
+        batches = {}
+        ws_clients = self._ws_clients
+        for instance_index in instance_indices:
+            if self._claim_slot(self.state.slots[instance_index]):
+                batches.setdefault(ws_clients[instance_index], []).append(instance_index)
+        return batches.items()
+
     def place_new_orders(self, calculate_prices_func, get_market_price_func, total_instances):
-        for instance_index in range(total_instances):
-            if self._should_skip_instance(instance_index):
-                continue
+        # One frame per connection carrying every instance it serves, all stamped with the same time
+        fallbacks = self.executor.map(
+            self._place_batch,
+            self._group_by_ws_client(range(total_instances)),
+            repeat(calculate_prices_func),
+            repeat(get_market_price_func),
+            repeat(int(time.time()))
+        )
+        # Whatever the batches could not carry retries per instance, all instances in parallel
+        list(self.executor.map(
+            self._place_claimed,
+            chain.from_iterable(fallbacks),
+            repeat(calculate_prices_func),
+            repeat(get_market_price_func)
+        ))
 
-            self.state.pending_actions[instance_index] = True
-            order_type = self.state.order_type or 'buy'
-            
-            try:
-                ws_client = self.ws_manager.get_ws_client(instance_index)
-                order, params = self._ws_operation_with_retry(
-                    operation=lambda p: ws_client.place_stop_limit_order_ws(
-                        order_type, p['trigger'], p['limit'], p['amount']
-                    ),
-                    instance_index=instance_index,
-                    get_market_price_func=get_market_price_func,
-                    calculate_prices_func=calculate_prices_func,
-                    order_type=order_type
-                )
+    def _place_batch(self, batch, calculate_prices_func, get_market_price_func, timestamp=None):
+        ws_client, instance_indices = batch
+        order_type = self.state.order_type or 'buy'
+        fallback = []
 
-                if not order:
-                    order = self._rest_fallback_operation(
-                        'place', instance_index, 
-                        get_market_price_func,
-                        calculate_prices_func,
-                        order_type
-                    )
-
-                if order:
-                    client_order_id = order.get('client_order_id')
-                    # Update both mappings
-                    self.state.active_orders[instance_index] = {
-                        'order_id': order.get('id'),
-                        'client_order_id': client_order_id,
-                        'last_price': params['price'],
-                        'limit_price': params['limit'],
-                        'order_type': order_type,
-                        'timestamp': time.time()
-                    }
-                    if client_order_id:
-                        self.state.order_mapping[client_order_id] = instance_index
-                    del self.state.pending_actions[instance_index]
+        try:
+            # One price snapshot prices the whole batch, so the ladder stays consistent
+            current_price = get_market_price_func()
+            params_list = []
+            for instance_index in instance_indices:
+                params = self._generate_order_parameters(
+                    instance_index, get_market_price_func,
+                    calculate_prices_func, order_type, current_price
+                )
+                if params['amount'] is not None and params['amount'] > 0:
+                    params_list.append((instance_index, params))
                 else:
-                    self.logger.error(f"Permanent failure: {instance_index}")
+                    fallback.append(instance_index)
 
-            except Exception as e:
-                self.logger.error(f"Final failure: {instance_index} - {str(e)}")
+            orders = None
+            if params_list:
+                orders = ws_client.place_stop_limit_orders_batch_ws(
+                    order_type,
+                    [(p['trigger'], p['limit'], p['amount']) for _, p in params_list],
+                    timestamp=timestamp
+                )
+
+            if orders:
+                for (instance_index, params), order in zip(params_list, orders):
+                    self._record_placement(instance_index, order, params, order_type)
+            else:
+                fallback.extend(instance_index for instance_index, _ in params_list)
+
+        except Exception as e:
+            self.logger.error(f"Batch placement failed: {str(e)}")
+            fallback = [i for i in instance_indices if self.state.slots[i].pending]
+
+        # Left for the per-instance retry/REST path, run by the caller
+        return fallback
+
+    def _place_claimed(self, instance_index, calculate_prices_func, get_market_price_func):
+        order_type = self.state.order_type or 'buy'
+
+        try:
+            ws_client = self._ws_clients[instance_index]
+            order, params = self._ws_operation_with_retry(
+                ws_method=ws_client.place_stop_limit_order_ws,
+                order_ref=order_type,
+                instance_index=instance_index,
+                get_market_price_func=get_market_price_func,
+                calculate_prices_func=calculate_prices_func,
+                order_type=order_type
+            )
+
+            if not order:
+                order = self._rest_fallback_operation(
+                    'place', instance_index, 
+                    get_market_price_func,
+                    calculate_prices_func,
+                    order_type
+                )
+
+            if order:
+                self._record_placement(instance_index, order, params, order_type)
+            else:
+                self.logger.error(f"Permanent failure: {instance_index}")
+
+        except Exception as e:
+            self.logger.error(f"Final failure: {instance_index} - {str(e)}")
+
+    def _record_placement(self, instance_index, order, params, order_type):
+        client_order_id = order.get('client_order_id')
+        # Update both mappings
+        self.state.set_order(instance_index, {
+            'order_id': order.get('id'),
+            'client_order_id': client_order_id,
+            'last_price': params['price'],
+            'limit_price': params['limit'],
+            'order_type': order_type,
+            'timestamp': time.monotonic_ns()
+        })
+        if client_order_id:
+            self.state.order_mapping[client_order_id] = instance_index
+        self.state.slots[instance_index].pending = False
 
     def amend_order(self, instance_index, get_market_price_func, calculate_prices_func):
-        self.state.pending_actions[instance_index] = True
-        
+        if self._claim_slot(self.state.slots[instance_index]):
+            self._amend_claimed(instance_index, get_market_price_func, calculate_prices_func)
+
+    def _amend_claimed(self, instance_index, get_market_price_func, calculate_prices_func):
+        slot = self.state.slots[instance_index]
         try:
-            order_state = self.state.active_orders.get(instance_index)
+            order_state = slot.order
             if not order_state:
                 return
 
-            ws_client = self.ws_manager.get_ws_client(instance_index)
+            ws_client = self._ws_clients[instance_index]
             amendment, params = self._ws_operation_with_retry(
-                operation=lambda p: ws_client.amend_order_ws(
-                    order_state['client_order_id'],
-                    p['trigger'], p['limit'], p['amount']
-                ),
+                ws_method=ws_client.amend_order_ws,
+                order_ref=order_state['client_order_id'],
                 instance_index=instance_index,
                 get_market_price_func=get_market_price_func,
                 calculate_prices_func=calculate_prices_func,
-                order_type=order_state['order_type'],
-                is_amendment=True,
-                previous_params={
-                    'client_order_id': order_state['client_order_id']
-                }
+                order_type=order_state['order_type']
             )
 
             if not amendment:
@@ -187,102 +305,164 @@ class ParallelOrderManager:
                 )
 
             if amendment:
-                # Update active orders but preserve client_order_id
-                order_state['last_price'] = params['price']
-                order_state['limit_price'] = params['limit']
-                order_state['timestamp'] = time.time()
-                del self.state.pending_actions[instance_index]
+                self._record_amendment(instance_index, params)
 
         except Exception as e:
             self.logger.error(f"Permanent failure: {instance_index} - {str(e)}")
 
+    def _record_amendment(self, instance_index, params):
+        slot = self.state.slots[instance_index]
+        # The WS thread may have cleared a filled/cancelled order since the amend went out;
+        # skip it rather than fail the rest of the batch into the REST fallback
+        order = slot.order
+        if order is None:
+            slot.pending = False
+            return
+        # Update active orders but preserve client_order_id
+        self.state.update_prices(instance_index, params['price'], params['limit'])
+        order['timestamp'] = time.monotonic_ns()
+        slot.pending = False
+
+    def _amend_batch(self, batch, get_market_price_func, calculate_prices_func, timestamp=None):
+        ws_client, instance_indices = batch
+        slots = self.state.slots
+        amendments = []
+        fallback = []
+
+        try:
+            current_price = get_market_price_func()
+            for instance_index in instance_indices:
+                order_state = slots[instance_index].order
+                if not order_state:
+                    slots[instance_index].pending = False
+                    continue
+                params = self._generate_order_parameters(
+                    instance_index, get_market_price_func,
+                    calculate_prices_func, order_state['order_type'], current_price
+                )
+                if order_state['order_type'] == 'buy' and not (params['amount'] and params['amount'] > 0):
+                    fallback.append(instance_index)
+                    continue
+                amendments.append((instance_index, order_state['client_order_id'], params))
+
+            result = None
+            if amendments:
+                result = ws_client.amend_orders_batch_ws(
+                    [(cid, p['trigger'], p['limit'], p['amount']) for _, cid, p in amendments],
+                    timestamp=timestamp
+                )
+
+            if result:
+                for instance_index, _, params in amendments:
+                    self._record_amendment(instance_index, params)
+            else:
+                fallback.extend(instance_index for instance_index, _, _ in amendments)
+
+        except Exception as e:
+            self.logger.error(f"Batch amendment failed: {str(e)}")
+            fallback = [i for i in instance_indices if slots[i].pending]
+
+        return fallback
+
     def monitor_active_orders(self, get_market_price_func, calculate_prices_func):
         current_price = get_market_price_func()
-        
-        for instance_index, order_state in list(self.state.active_orders.items()):
-            if instance_index in self.state.pending_actions:
-                continue
-                
-            order_type = order_state['order_type']
-            last_price = order_state['last_price']
-            
-            if ((order_type == 'buy' and current_price < last_price) or 
-                (order_type == 'sell' and current_price > last_price)):
-                self.amend_order(instance_index, get_market_price_func, calculate_prices_func)
+        state = self.state
+
+        # Buys placed above the current price and sells placed below it; untouched orders are never visited.
+        # In-flight instances are filtered when claimed, which also lets timed-out claims through
+        crossed = state.buy_by_last.above(current_price) + state.sell_by_last.below(current_price)
+        to_amend = [instance_index for _, instance_index in crossed]
+
+        fallbacks = self.executor.map(
+            self._amend_batch,
+            self._group_by_ws_client(to_amend),
+            repeat(get_market_price_func),
+            repeat(calculate_prices_func),
+            repeat(int(time.time()))
+        )
+        list(self.executor.map(
+            self._amend_claimed,
+            chain.from_iterable(fallbacks),
+            repeat(get_market_price_func),
+            repeat(calculate_prices_func)
+        ))
 
     def handle_order_execution(self, order_id, event):
         client_order_id = event.get('client_order_id')
-        instance_index = self.state.order_mapping.get(client_order_id)
-        
-        if not instance_index:
-            # Fallback search
-            for idx, state in self.state.active_orders.items():
-                if state.get('client_order_id') == client_order_id:
-                    instance_index = idx
-                    break
-        
+        instance_index = self.state.find_instance(client_order_id, order_id)
         if instance_index is not None:
-            if state := self.state.active_orders.get(instance_index):
+            slot = self.state.slots[instance_index]
+            if state := slot.order:
                 if state['order_type'] == 'buy':
                     self.state.last_buy_amount = float(event.get('filled', 0))
-                # Clean both mappings
-                del self.state.active_orders[instance_index]
-                if client_order_id in self.state.order_mapping:
-                    del self.state.order_mapping[client_order_id]
+                self.state.clear_order(instance_index)
 
     def recover_state(self, instance_index=None):
         self.logger.info("Initiating state recovery...")
         if instance_index is not None:
             self._cancel_instance_order(instance_index)
         else:
-            for idx in list(self.state.active_orders.keys()):
-                self._cancel_instance_order(idx)
+            # Issue all cancels at once rather than one round trip after another
+            active = [idx for idx, slot in enumerate(self.state.slots) if slot.order is not None]
+            list(self.executor.map(self._cancel_instance_order, active))
 
     def _cancel_instance_order(self, instance_index):
-        order_state = self.state.active_orders.get(instance_index)
+        slot = self.state.slots[instance_index]
+        order_state = slot.order
         if order_state:
             try:
-                client_order_id = order_state.get('client_order_id')
-                ws_client = self.ws_manager.get_ws_client(instance_index)
+                ws_client = self._ws_clients[instance_index]
                 ws_client.cancel_order_ws(order_state['order_id'])
-                
-                # Clean both mappings
-                if client_order_id in self.state.order_mapping:
-                    del self.state.order_mapping[client_order_id]
-                del self.state.active_orders[instance_index]
+                self.state.clear_order(instance_index)
                 
             except Exception as e:
                 self.logger.error(f"Recovery error: {str(e)}")
             finally:
-                self.state.pending_actions.pop(instance_index, None)
+                slot.pending = False
+
+    def _cancel_batch(self, batch):
+        ws_client, orders = batch
+        try:
+            return ws_client.cancel_orders_batch_ws([order['order_id'] for _, order in orders])
+        except Exception as e:
+            self.logger.error(f"Shutdown error: {str(e)}")
+            return False
+
+    def _market_sell_batch(self, batch):
+        ws_client, amounts = batch
+        try:
+            ws_client.place_market_orders_batch_ws('sell', amounts)
+        except Exception as e:
+            self.logger.error(f"Shutdown error: {str(e)}")
 
     def graceful_shutdown(self):
         self.logger.info("Starting graceful shutdown...")
-        self.state.pending_actions.clear()
-        
-        # Cancel buy orders
-        for idx, state in list(self.state.active_orders.items()):
-            if state['order_type'] == 'buy':
-                self._cancel_instance_order(idx)
-        
-        # Process sell orders
-        sell_orders = [(idx, state) for idx, state in self.state.active_orders.items()
-                      if state['order_type'] == 'sell']
-        sell_orders.sort(key=lambda x: x[1]['limit_price'])
-        
-        for idx, state in sell_orders:
-            try:
-                client_order_id = state.get('client_order_id')
-                ws_client = self.ws_manager.get_ws_client(idx)
-                if ws_client.cancel_order_ws(state['order_id']):
-                    amount = state.get('executed_amount')
+        state = self.state
+        slots = state.slots
+        ws_clients = self._ws_clients
+        for slot in slots:
+            slot.pending = False
+
+        # Sells in limit-price order, then buys; every order on a connection goes out in one cancel frame
+        sell_indices = [idx for _, idx in state.sell_by_limit.snapshot()]
+        buy_indices = [idx for idx, slot in enumerate(slots) if slot.order and state.is_buy[idx]]
+        cancel_batches = {}
+        for idx in sell_indices + buy_indices:
+            if (order := slots[idx].order) is not None:
+                cancel_batches.setdefault(ws_clients[idx], []).append((idx, order))
+
+        cancelled = list(self.executor.map(self._cancel_batch, cancel_batches.items()))
+
+        # Sells whose cancel went out are closed with one market frame per connection
+        market_batches = {}
+        for (ws_client, orders), ok in zip(cancel_batches.items(), cancelled):
+            for idx, order in orders:
+                if ok and not state.is_buy[idx]:
+                    amount = order.get('executed_amount')
                     if amount and amount > 0:
-                        ws_client.place_market_order_ws('sell', amount)
-            except Exception as e:
-                self.logger.error(f"Shutdown error: {str(e)}")
-            finally:
-                if idx in self.state.active_orders:
-                    # Clean both mappings
-                    if client_order_id in self.state.order_mapping:
-                        del self.state.order_mapping[client_order_id]
-                    del self.state.active_orders[idx]
+                        market_batches.setdefault(ws_client, []).append(amount)
+                state.clear_order(idx)
+
+        list(self.executor.map(self._market_sell_batch, market_batches.items()))
+
+        self.executor.shutdown(wait=False)
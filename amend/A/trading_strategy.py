@@ -1,26 +1,136 @@
 import time
 import math
 import logging
+import threading
+from bisect import bisect_left, bisect_right, insort
 from math import ceil
 from gateio_api import GateIOAPIClient
 from ws_manager import WSManager
 from order_manager import OrderManager
 from parallel_order_manager import ParallelOrderManager
 
-class OrderState:
+class InstanceSlot:
+    __slots__ = ('lock', 'pending', 'pending_since', 'order')
+
     def __init__(self):
-        self.active_orders = {}    # {instance_index: order_data}
+        self.lock = threading.Lock()
+        self.pending = False       # True while a place/amend is in flight
+        self.pending_since = 0     # time.monotonic_ns() when pending was last set
+        self.order = None          # order_data, None when the instance is idle
+
+class PriceIndex:
+    """(price, instance_index) pairs kept sorted, at most one per instance."""
+
+    def __init__(self, total_instances):
+        self.entries = []
+        self._keys = [None] * total_instances
+        self._lock = threading.Lock()
+
+    def set(self, instance_index, price=None):
+        # price=None drops the instance from the index
+        with self._lock:
+            old_key = self._keys[instance_index]
+            if old_key is not None:
+                del self.entries[bisect_left(self.entries, old_key)]
+            new_key = None if price is None else (price, instance_index)
+            if new_key is not None:
+                insort(self.entries, new_key)
+            self._keys[instance_index] = new_key
+
+    def snapshot(self):
+        with self._lock:
+            return tuple(self.entries)
+
+    def above(self, price):
+        with self._lock:
+            return self.entries[bisect_right(self.entries, (price, math.inf)):]
+
+    def below(self, price):
+        with self._lock:
+            return self.entries[:bisect_left(self.entries, (price, -1))]
+
+class OrderState:
+    def __init__(self, total_instances):
+        self.slots = [InstanceSlot() for _ in range(total_instances)]  # indexed by instance_index
+        self.is_buy = bytearray(total_instances)
+        # Live orders by last_price, so the monitor only visits the ones the current price crossed
+        self.buy_by_last = PriceIndex(total_instances)
+        self.sell_by_last = PriceIndex(total_instances)
+        # Live sell orders by limit_price, for shutdown ordering
+        self.sell_by_limit = PriceIndex(total_instances)
         self.order_mapping = {}    # {client_order_id: instance_index}
+        self.order_id_to_instance = {}  # {exchange order_id: instance_index}
         self.order_type = 'buy'
         self.last_buy_amount = None
-        self.pending_actions = {}  # {instance_index: timestamp}
+        # Number of slots holding an order, kept in step by store_order/clear_order
+        self.active_count = 0
+        self._count_lock = threading.Lock()
+
+    def has_active_orders(self):
+        return self.active_count > 0
+
+    def find_instance(self, client_order_id, order_id):
+        instance_index = self.order_mapping.get(client_order_id)
+        if instance_index is None:
+            instance_index = self.order_id_to_instance.get(order_id)
+        return instance_index
+
+    def store_order(self, instance_index, order):
+        """Attach order data to an instance without touching the price indexes."""
+        slot = self.slots[instance_index]
+        with self._count_lock:
+            if slot.order is None:
+                self.active_count += 1
+            slot.order = order
+
+    def set_order(self, instance_index, order):
+        self.store_order(instance_index, order)
+        if order.get('order_id') is not None:
+            self.order_id_to_instance[order['order_id']] = instance_index
+        self.is_buy[instance_index] = is_buy = order['order_type'] == 'buy'
+        if is_buy:
+            self.sell_by_last.set(instance_index)
+            self.sell_by_limit.set(instance_index)
+            self.buy_by_last.set(instance_index, order['last_price'])
+        else:
+            self.buy_by_last.set(instance_index)
+            self.sell_by_last.set(instance_index, order['last_price'])
+            self.sell_by_limit.set(instance_index, order['limit_price'])
+
+    def update_prices(self, instance_index, last_price, limit_price):
+        order = self.slots[instance_index].order
+        order['last_price'] = last_price
+        order['limit_price'] = limit_price
+        if self.is_buy[instance_index]:
+            self.buy_by_last.set(instance_index, last_price)
+        else:
+            self.sell_by_last.set(instance_index, last_price)
+            self.sell_by_limit.set(instance_index, limit_price)
+
+    def clear_order(self, instance_index):
+        # Single exit point for an order: both indexes are dropped here with atomic pops,
+        # so the WS thread and the order workers can race on the same instance safely
+        slot = self.slots[instance_index]
+        with self._count_lock:
+            order = slot.order
+            if order is not None:
+                self.active_count -= 1
+            slot.order = None
+        if order is not None:
+            self.order_mapping.pop(order.get('client_order_id'), None)
+            self.order_id_to_instance.pop(order.get('order_id'), None)
+        self.buy_by_last.set(instance_index)
+        self.sell_by_last.set(instance_index)
+        self.sell_by_limit.set(instance_index)
 
 class TradingStrategy:
     def __init__(self, config):
         self.config = config
         self.api = GateIOAPIClient(config)
-        self.state = OrderState()
         self.logger = logging.getLogger("TradingStrategy")
+        self._price_ready = threading.Event()
+        self._price_moved = threading.Event()   # Wakes the strategy loop on a meaningful move
+        self._last_polled_price = None
         
         # Initial price setup
         self.logger.info("Fetching initial market price...")
@@ -30,10 +140,13 @@ class TradingStrategy:
         market = self.api.exchange.market(self.api.symbol)
         price_precision = market['precision'].get('price', self.config['trading'].get('fallback_price_precision'))
         self.tick_size = 10 ** (-price_precision)
-        self.logger.info(f"Determined tick size: {self.tick_size} (precision: {price_precision} digits)")
+        self._wake_threshold = 0.5 * self.tick_size
+        self.logger.info("Determined tick size: %s (precision: %s digits)", self.tick_size, price_precision)
         
         # WS Manager setup
         self.parallel_instances = self._determine_instances(self.current_price)
+        self.state = OrderState(self.parallel_instances)
+        self._build_price_offsets()
         self.ws_manager = WSManager(
             currency_pair=self.config['trading']['currency_pair'],
             on_price_callback=self.update_price,
@@ -59,6 +172,10 @@ class TradingStrategy:
 
     def update_price(self, price):
         self.current_price = price
+        self._price_ready.set()
+        last_polled = self._last_polled_price
+        if last_polled is None or abs(price - last_polled) >= self._wake_threshold:
+            self._price_moved.set()
 
     def on_order_event(self, order_id, event):
         status = event.get('status')
@@ -66,107 +183,106 @@ class TradingStrategy:
         side = event.get('side')
         filled = float(event.get('filled', 0))
         
-        # 1. Try direct lookup using order_mapping
-        instance_index = self.state.order_mapping.get(client_order_id)
-        
-        # 2. Fallback search if not found
-        if instance_index is None:
-            instance_index = next(
-                (idx for idx, state in self.state.active_orders.items()
-                 if state.get('client_order_id') == client_order_id),
-                None
-            )
-            # Update mapping if found through search
-            if instance_index is not None:
-                self.state.order_mapping[client_order_id] = instance_index
+        # Both indexes are kept in step with the slots, so a miss means the order isn't ours
+        instance_index = self.state.find_instance(client_order_id, order_id)
+        slot = self.state.slots[instance_index] if instance_index is not None else None
 
         # Clear pending actions flag
-        if instance_index is not None and instance_index in self.state.pending_actions:
-            del self.state.pending_actions[instance_index]
+        if slot is not None:
+            slot.pending = False
 
         # Handle sell execution (full or partial)
         if side == 'sell' and filled > 0:
-            if instance_index is not None and instance_index in self.state.active_orders:
-                # Remove both mappings
-                if client_order_id in self.state.order_mapping:
-                    del self.state.order_mapping[client_order_id]
-                del self.state.active_orders[instance_index]
-                self.logger.info(f"Sell order {client_order_id} removed from tracking (filled: {filled})")
+            if slot is not None and slot.order is not None:
+                self.state.clear_order(instance_index)
+                self.logger.info("Sell order %s removed from tracking (filled: %s)", client_order_id, filled)
                 self.state.order_type = 'buy'
             return  # Skip normal status handling
 
         # Normal handling for non-sell orders
         if status in ["closed", "filled", "canceled"]:
-            if instance_index is not None:
-                # Remove both mappings
-                if client_order_id in self.state.order_mapping:
-                    del self.state.order_mapping[client_order_id]
-                if instance_index in self.state.active_orders:
-                    del self.state.active_orders[instance_index]
-        elif status == "open" and instance_index is not None:
-            self.state.active_orders[instance_index] = {
-                'order_id': order_id,
-                'client_order_id': client_order_id,
-                'symbol': event.get('symbol'),
-                'side': side,
-                'price': float(event.get('price')),
-                'amount': float(event.get('amount')),
-                'status': status
-            }
+            if slot is not None:
+                self.state.clear_order(instance_index)
+        elif status == "open" and slot is not None:
+            # Merge into the placement record so order_type/limit_price survive the exchange id arriving.
+            # Fields are written straight into it rather than through a throwaway dict and update().
+            order = slot.order if slot.order is not None else {}
+            get = event.get
+            order['order_id'] = order_id
+            order['client_order_id'] = client_order_id
+            order['symbol'] = get('symbol')
+            order['side'] = side
+            order['price'] = float(get('price'))
+            order['amount'] = float(get('amount'))
+            order['status'] = status
+            self.state.store_order(instance_index, order)
             # Ensure mapping exists
             self.state.order_mapping[client_order_id] = instance_index
+            self.state.order_id_to_instance[order_id] = instance_index
 
-    def _calculate_prices(self, last_price, order_type, instance_index=0):
+    def _build_price_offsets(self):
+        # Per-instance trigger/limit offsets never change once tick size and instance count are known
         tick_size = self.tick_size
-        if order_type == 'buy':
-            base_trigger = self.config['trading']['buy']['trigger_price_adjust']
-            base_limit = self.config['trading']['buy']['limit_price_adjust']
-            trigger = last_price + ((base_trigger + instance_index) * tick_size)
-            limit = last_price + ((base_limit + instance_index) * tick_size)
-        else:
-            base_trigger = self.config['trading']['sell']['trigger_price_adjust']
-            base_limit = self.config['trading']['sell']['limit_price_adjust']
-            trigger = last_price - ((base_trigger + instance_index) * tick_size)
-            limit = last_price - ((base_limit + instance_index) * tick_size)
-        decimal_places = -int(math.log10(tick_size))
-        return round(trigger, decimal_places), round(limit, decimal_places)
+        instances = range(self.parallel_instances)
+        offsets = {}
+        for order_type, sign in (('buy', 1), ('sell', -1)):
+            base_trigger = self.config['trading'][order_type]['trigger_price_adjust']
+            base_limit = self.config['trading'][order_type]['limit_price_adjust']
+            offsets[order_type] = (
+                [sign * ((base_trigger + i) * tick_size) for i in instances],
+                [sign * ((base_limit + i) * tick_size) for i in instances]
+            )
+        self._price_offsets = offsets
+        self._decimal_places = -int(math.log10(tick_size))
+
+    def _calculate_prices(self, last_price, order_type, instance_index=0):
+        trigger_offsets, limit_offsets = self._price_offsets['buy' if order_type == 'buy' else 'sell']
+        decimal_places = self._decimal_places
+        return (round(last_price + trigger_offsets[instance_index], decimal_places),
+                round(last_price + limit_offsets[instance_index], decimal_places))
 
     def _get_market_price(self):
-        start_time = time.time()
-        while self.current_price is None:
-            if time.time() - start_time > 5:
-                self.logger.error("No price update received within 5 seconds.")
-                break
-            time.sleep(0.01)
+        if self.current_price is None and not self._price_ready.wait(timeout=5):
+            self.logger.error("No price update received within 5 seconds.")
         return self.current_price
 
     def _determine_instances(self, current_price):
         if fixed := self.config['trading'].get('parallel_instances'):
             return fixed
-        price_str = f"{current_price:.8f}"
-        digits = [c for c in price_str if c.isdigit() and c != '0']
-        significant = float(f"{digits[0]}.{digits[1]}") if len(digits) > 1 else float(price_str)
-        return int(significant * self.config['trading'].get('dynamic_multiplier', 24))
+        # First two significant digits as d.d (0.0004567 -> 4.5), at the same 8-decimal resolution as before
+        price = round(current_price, 8)
+        exponent = math.floor(math.log10(price))
+        two_digits = int(price / 10.0 ** (exponent - 1) + 1e-9)
+        if two_digits >= 100:    # log10 landed just below a power of ten
+            two_digits //= 10
+        elif two_digits < 10:    # log10 landed just above one
+            two_digits = int(price / 10.0 ** (exponent - 2) + 1e-9)
+        return int(two_digits / 10 * self.config['trading'].get('dynamic_multiplier', 24))
 
     def manage_strategy(self):
         trade_count = 0
         max_trades = self.config['trading'].get('trade_limit')
+        poll_interval = self.config['trading']['price_poll_interval']
+        # Bound once; the loop body then only touches locals
+        state = self.state
+        place = self.parallel_order_manager.place_new_orders
+        monitor = self.parallel_order_manager.monitor_active_orders
+        calculate_prices = self._calculate_prices
+        get_market_price = self._get_market_price
+        instances = self.parallel_instances
+        price_moved = self._price_moved
         while True:
             if max_trades and trade_count >= max_trades:
                 break
             try:
-                if not self.state.active_orders:
-                    self.parallel_order_manager.place_new_orders(
-                        self._calculate_prices,
-                        self._get_market_price,
-                        self.parallel_instances
-                    )
+                self._last_polled_price = self.current_price
+                if state.active_count == 0:
+                    place(calculate_prices, get_market_price, instances)
                 else:
-                    self.parallel_order_manager.monitor_active_orders(
-                        self._get_market_price,
-                        self._calculate_prices
-                    )
-                time.sleep(self.config['trading']['price_poll_interval'])
+                    monitor(get_market_price, calculate_prices)
+                # Sleep until the price moves half a tick, or at most one poll interval
+                price_moved.wait(timeout=poll_interval)
+                price_moved.clear()
                 trade_count += 1
             except KeyboardInterrupt:
                 break
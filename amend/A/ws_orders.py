@@ -1,153 +1,169 @@
 import time
-import json
+import orjson
 import logging
 import hashlib
 import hmac
-import uuid
+from binascii import hexlify
+import itertools
+import os
+
+# Session-unique client order ids; shared by every connection so ids never collide across them
+_CID_PREFIX = f"t-{int(time.time())}-{os.getpid()}-"
+_cid_counter = itertools.count()
+
+def _next_client_order_id():
+    return _CID_PREFIX + str(next(_cid_counter))
 
 class GateIOWebSocketOrders:
     def __init__(self, ws_connection):
         self.ws_connection = ws_connection
         self.logger = logging.getLogger("GateIOWebSocketOrders")
+        # Keyed once: copies start from the precomputed inner/outer SHA-512 states
+        self._hmac_template = hmac.new(ws_connection.api_secret.encode('utf-8'), digestmod=hashlib.sha512)
+        # channel/event/auth never change within a session, so serialise them once per event
+        api_key = orjson.dumps(ws_connection.api_key)
+        self._envelope_heads = {
+            event: b'{"channel":"spot.order","event":"%s","auth":{"method":"api_key","KEY":%s,"SIGN":"' % (event.encode('ascii'), api_key)
+            for event in ("create", "cancel", "amend")
+        }
+
+    def _sign(self, payload_str):
+        mac = self._hmac_template.copy()
+        mac.update(payload_str.encode('utf-8'))
+        # Hex bytes go straight into the frame, no str round trip
+        return hexlify(mac.digest())
+
+    def _send_signed(self, event, payload, timestamp=None, callback=None, client_order_id=None):
+        """Sign and send one spot.order frame; the callback is registered before the send so the
+        created event can never beat it."""
+        timestamp = timestamp or int(time.time())
+        signature = self._sign(f"channel=spot.order&event={event}&time={timestamp}")
+        if callback:
+            self.ws_connection.add_pending_order(client_order_id, callback)
+        # Splice the signature, time and serialised payload into the cached envelope
+        self.ws_connection.ws.send(self._envelope_heads[event] + b'%s"},"time":%d,"payload":%s}' % (
+            signature, timestamp, orjson.dumps(payload)))
+
+    def _stop_limit_entry(self, order_type, trigger_price, limit_price, amount, client_order_id):
+        return {
+            "client_order_id": client_order_id,
+            "symbol": self.ws_connection.currency_pair,
+            "type": "limit",
+            "side": order_type,
+            "price": limit_price,
+            "amount": amount,
+            "stopPrice": trigger_price,
+            "timeInForce": "IOC" if order_type == 'buy' else "GTC",  # Hardcoded IOC for buys
+            "price_type": 1
+        }
+
+    def _market_entry(self, order_type, amount, client_order_id):
+        return {
+            "client_order_id": client_order_id,
+            "symbol": self.ws_connection.currency_pair,
+            "type": "market",
+            "side": order_type,
+            "amount": amount
+        }
 
-    def place_stop_limit_order_ws(self, order_type, trigger_price, limit_price, amount, callback=None):
-        self.logger.info(f"Placing {order_type} stop-limit order via WebSocket with trigger: {trigger_price} and limit: {limit_price}")
+    @staticmethod
+    def _amend_entry(client_order_id, new_trigger, new_limit, new_amount):
+        entry = {
+            "client_order_id": client_order_id,
+            "stopPrice": new_trigger,
+            "price": new_limit,
+        }
+        if new_amount is not None:
+            entry["amount"] = new_amount
+        return entry
+
+    def place_stop_limit_order_ws(self, order_type, trigger_price, limit_price, amount, callback=None, timestamp=None):
         try:
-            timestamp = int(time.time())
-            client_order_id = str(uuid.uuid4())
-            payload_str = f"channel=spot.order&event=create&time={timestamp}"
-            signature = hmac.new(
-                self.ws_connection.api_secret.encode('utf-8'),
-                payload_str.encode('utf-8'),
-                hashlib.sha512
-            ).hexdigest()
-            order_msg = {
-                "time": timestamp,
-                "channel": "spot.order",
-                "event": "create",
-                "payload": [{
-                    "client_order_id": client_order_id,
-                    "symbol": self.ws_connection.currency_pair,
-                    "type": "limit",
-                    "side": order_type,
-                    "price": limit_price,
-                    "amount": amount,
-                    "stopPrice": trigger_price,
-                    "timeInForce": "IOC" if order_type == 'buy' else "GTC",  # Hardcoded IOC for buys
-                    "price_type": 1
-                }],
-                "auth": {
-                    "method": "api_key",
-                    "KEY": self.ws_connection.api_key,
-                    "SIGN": signature
-                }
-            }
-            if callback:
-                with self.ws_connection.pending_orders_lock:
-                    self.ws_connection.pending_orders[client_order_id] = callback
-            self.ws_connection.ws.send(json.dumps(order_msg))
+            client_order_id = _next_client_order_id()
+            entry = self._stop_limit_entry(order_type, trigger_price, limit_price, amount, client_order_id)
+            self._send_signed("create", [entry], timestamp, callback, client_order_id)
+            self.logger.info("Placed %s stop-limit order via WebSocket with trigger: %s and limit: %s",
+                             order_type, trigger_price, limit_price)
             return {"client_order_id": client_order_id, "status": "pending"}
         except Exception as e:
             self.logger.error(f"WebSocket order placement failed: {e}")
             return None
 
-    def cancel_order_ws(self, order_id):
-        self.logger.info(f"Cancelling order {order_id} via WebSocket")
+    def place_stop_limit_orders_batch_ws(self, order_type, orders, timestamp=None):
+        """Send several stop-limit orders in one frame; orders are (trigger, limit, amount) tuples."""
+        try:
+            # client_order_id doubles as the per-order tag for routing the created events
+            payload = [
+                self._stop_limit_entry(order_type, trigger_price, limit_price, amount, _next_client_order_id())
+                for trigger_price, limit_price, amount in orders
+            ]
+            self._send_signed("create", payload, timestamp)
+            self.logger.info("Placed %d %s stop-limit orders via WebSocket in one batch", len(payload), order_type)
+            return [{"client_order_id": entry["client_order_id"], "status": "pending"} for entry in payload]
+        except Exception as e:
+            self.logger.error(f"WebSocket batch order placement failed: {e}")
+            return None
+
+    def cancel_order_ws(self, order_id, timestamp=None):
         try:
-            timestamp = int(time.time())
-            payload_str = f"channel=spot.order&event=cancel&time={timestamp}"
-            signature = hmac.new(
-                self.ws_connection.api_secret.encode('utf-8'),
-                payload_str.encode('utf-8'),
-                hashlib.sha512
-            ).hexdigest()
-        
-            cancel_msg = {
-                "time": timestamp,
-                "channel": "spot.order",
-                "event": "cancel",
-                "payload": [order_id],
-                "auth": {
-                    "method": "api_key",
-                    "KEY": self.ws_connection.api_key,
-                    "SIGN": signature
-                }
-            }
-            self.ws_connection.ws.send(json.dumps(cancel_msg))
-            self.logger.info(f"Cancellation message for order {order_id} sent successfully.")
+            self._send_signed("cancel", [order_id], timestamp)
+            self.logger.info("Cancellation message for order %s sent via WebSocket.", order_id)
             return True
         except Exception as e:
             self.logger.error(f"WebSocket order cancellation failed for order {order_id}: {e}")
             return False
 
-    def place_market_order_ws(self, order_type, amount, callback=None):
-        self.logger.info(f"Placing market {order_type} order via WebSocket for amount: {amount}")
+    def cancel_orders_batch_ws(self, order_ids, timestamp=None):
+        """Cancel several orders in one frame."""
+        try:
+            order_ids = list(order_ids)
+            self._send_signed("cancel", order_ids, timestamp)
+            self.logger.info("Cancelled %d orders via WebSocket in one batch", len(order_ids))
+            return True
+        except Exception as e:
+            self.logger.error(f"WebSocket batch cancellation failed: {e}")
+            return False
+
+    def place_market_order_ws(self, order_type, amount, callback=None, timestamp=None):
         try:
-            timestamp = int(time.time())
-            client_order_id = str(uuid.uuid4())
-            payload_str = f"channel=spot.order&event=create&time={timestamp}"
-            signature = hmac.new(
-                self.ws_connection.api_secret.encode('utf-8'),
-                payload_str.encode('utf-8'),
-                hashlib.sha512
-            ).hexdigest()
-            order_msg = {
-                "time": timestamp,
-                "channel": "spot.order",
-                "event": "create",
-                "payload": [{
-                    "client_order_id": client_order_id,
-                    "symbol": self.ws_connection.currency_pair,
-                    "type": "market",
-                    "side": order_type,
-                    "amount": amount
-                }],
-                "auth": {
-                    "method": "api_key",
-                    "KEY": self.ws_connection.api_key,
-                    "SIGN": signature
-                }
-            }
-            if callback:
-                with self.ws_connection.pending_orders_lock:
-                    self.ws_connection.pending_orders[client_order_id] = callback
-            self.ws_connection.ws.send(json.dumps(order_msg))
+            client_order_id = _next_client_order_id()
+            entry = self._market_entry(order_type, amount, client_order_id)
+            self._send_signed("create", [entry], timestamp, callback, client_order_id)
+            self.logger.info("Placed market %s order via WebSocket for amount: %s", order_type, amount)
             return {"client_order_id": client_order_id, "status": "pending"}
         except Exception as e:
             self.logger.error(f"WebSocket market order failed: {e}")
             return None
 
-    def amend_order_ws(self, client_order_id, new_trigger, new_limit, new_amount=None):
-        self.logger.info(f"Amending order {client_order_id} with new trigger: {new_trigger}, limit: {new_limit}, amount: {new_amount}")
+    def place_market_orders_batch_ws(self, order_type, amounts, timestamp=None):
+        """Send several market orders in one frame."""
+        try:
+            payload = [self._market_entry(order_type, amount, _next_client_order_id()) for amount in amounts]
+            self._send_signed("create", payload, timestamp)
+            self.logger.info("Placed %d market %s orders via WebSocket in one batch", len(payload), order_type)
+            return [{"client_order_id": entry["client_order_id"], "status": "pending"} for entry in payload]
+        except Exception as e:
+            self.logger.error(f"WebSocket batch market order failed: {e}")
+            return None
+
+    def amend_order_ws(self, client_order_id, new_trigger, new_limit, new_amount=None, timestamp=None):
         try:
-            timestamp = int(time.time())
-            payload = {
-                "client_order_id": client_order_id,
-                "stopPrice": new_trigger,
-                "price": new_limit,
-            }
-            if new_amount is not None:
-                payload["amount"] = new_amount
-
-            payload_str = f"channel=spot.order&event=amend&time={timestamp}"
-            signature = hmac.new(
-                self.ws_connection.api_secret.encode('utf-8'),
-                payload_str.encode('utf-8'),
-                hashlib.sha512
-            ).hexdigest()
-            amend_msg = {
-                "time": timestamp,
-                "channel": "spot.order",
-                "event": "amend",
-                "payload": [payload],
-                "auth": {
-                    "method": "api_key",
-                    "KEY": self.ws_connection.api_key,
-                    "SIGN": signature
-                }
-            }
-            self.ws_connection.ws.send(json.dumps(amend_msg))
+            entry = self._amend_entry(client_order_id, new_trigger, new_limit, new_amount)
+            self._send_signed("amend", [entry], timestamp)
+            self.logger.info("Amended order %s via WebSocket with new trigger: %s, limit: %s, amount: %s",
+                             client_order_id, new_trigger, new_limit, new_amount)
             return {"client_order_id": client_order_id, "status": "amend_pending"}
         except Exception as e:
             self.logger.error(f"WebSocket order amendment failed: {e}")
             return None
+
+    def amend_orders_batch_ws(self, amendments, timestamp=None):
+        """Send several amendments in one frame; amendments are (client_order_id, trigger, limit, amount) tuples."""
+        try:
+            payload = [self._amend_entry(*amendment) for amendment in amendments]
+            self._send_signed("amend", payload, timestamp)
+            self.logger.info("Amended %d orders via WebSocket in one batch", len(payload))
+            return [{"client_order_id": entry["client_order_id"], "status": "amend_pending"} for entry in payload]
+        except Exception as e:
+            self.logger.error(f"WebSocket batch order amendment failed: {e}")
+            return None
@@ -18,6 +18,12 @@ class GateIOAPIClient:
             'secret': self.secret,
             'enableRateLimit': True,
         })
+        # Resolve the market once; ccxt would otherwise look it up on every order
+        self.exchange.load_markets()
+        self._market = self.exchange.market(self.symbol)
+        symbol = self.symbol
+        amount_to_precision = self.exchange.amount_to_precision
+        self._amount_to_precision = lambda amount: amount_to_precision(symbol, amount)
         self.logger = logging.getLogger("GateIOAPIClient")
         self.logger.info(f"Initialized API client for {self.symbol}")
 
@@ -86,9 +92,8 @@ class GateIOAPIClient:
                 self.logger.error("Invalid order amount calculated; order will not be placed.")
                 return None
 
-            market = self.exchange.market(self.symbol)
             # Format the amount using the market's precision settings
-            amount = self.exchange.amount_to_precision(self.symbol, amount)
+            amount = self._amount_to_precision(amount)
             self.logger.debug(f"Formatted amount: {amount}")
 
             params = {
@@ -122,8 +127,7 @@ class GateIOAPIClient:
         """
         self.logger.info(f"Placing market {order_type} order for amount: {amount}")
         try:
-            market = self.exchange.market(self.symbol)
-            amount = self.exchange.amount_to_precision(self.symbol, amount)
+            amount = self._amount_to_precision(amount)
             order = self.exchange.create_order(
                 symbol=self.symbol,
                 type='market',
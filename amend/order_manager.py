@@ -2,6 +2,28 @@ import logging
 import time
 import math
 
+# Powers of ten and their 1..10 multiples for exponents -12..5, indexed by exponent + 12
+_POW10_MIN = -12
+_POW10 = tuple(10 ** e for e in range(_POW10_MIN, 6))
+_ROUND_UP = tuple(
+    tuple(d * (10 ** e) for d in range(10)) + (10 ** (e + 1),)
+    for e in range(_POW10_MIN, 6)
+)
+_LOG10_2 = math.log10(2)
+
+def _round_up_to_one_significant_log10(x):
+    exponent = math.floor(math.log10(x))
+    factor = 10 ** exponent
+    first_digit = int(x / factor)
+    # If any fraction exists beyond the first digit, bump it up by one.
+    if x > first_digit * factor:
+        first_digit += 1
+        # Handle the rollover case (e.g. 9 -> 10)
+        if first_digit == 10:
+            first_digit = 1
+            exponent += 1
+    return first_digit * (10 ** exponent)
+
 def round_up_to_one_significant(x):
     """
     Rounds a positive number up to one significant figure.
@@ -11,18 +33,16 @@ def round_up_to_one_significant(x):
     """
     if x == 0:
         return 0
-    exponent = math.floor(math.log10(abs(x)))
-    factor = 10 ** exponent
-    first_digit = int(abs(x) / factor)
-    # If any fraction exists beyond the first digit, bump it up by one.
-    if abs(x) > first_digit * factor:
-        first_digit += 1
-        # Handle the rollover case (e.g. 9 -> 10)
-        if first_digit == 10:
-            first_digit = 1
-            exponent += 1
-            factor = 10 ** exponent
-    return first_digit * factor
+    x = abs(x)
+    # Decimal exponent estimated from the binary one; off by at most one, fixed by a single compare.
+    # Exact multiples come from a table, so no pow() and no float noise from ceil(x / factor)
+    i = math.floor(math.frexp(x)[1] * _LOG10_2) - _POW10_MIN
+    if not 0 < i < len(_POW10):
+        return _round_up_to_one_significant_log10(x)
+    i -= x < _POW10[i]
+    steps = _ROUND_UP[i]
+    first_digit = int(x / _POW10[i])
+    return steps[first_digit + (x > steps[first_digit])]
 
 class OrderManager:
     def __init__(self, api, state, config, ws_manager):
@@ -31,11 +51,16 @@ class OrderManager:
         self.config = config
         self.ws_manager = ws_manager
         self.logger = logging.getLogger("OrderManager")
+        self._sell_fee = config['trading'].get('sell_trading_fee', 0.001)
+        self._backoff_cap = config['api'].get('ws_retry_cap', 5.0)
+        self._retry_budget = config['api'].get('ws_retry_budget', 10.0)
 
     def place_new_order(self, calculate_prices_func, get_market_price_func):
         max_retries = 5
         base_delay = 0.1  # Starting delay in seconds
         retries = 0
+        # The strategy thread blocks while retrying, so bound the total wait as well as each step
+        deadline = time.monotonic() + self._retry_budget
         while retries < max_retries:
             last_price = get_market_price_func()  # Get updated market price
             order_type = self.state.order_type or 'buy'
@@ -45,8 +70,7 @@ class OrderManager:
             custom_amount = None
             if order_type == 'sell':
                 if self.state.last_buy_amount is not None:
-                    fee_rate = self.config['trading'].get('sell_trading_fee', 0.001)
-                    raw_fee = self.state.last_buy_amount * fee_rate
+                    raw_fee = self.state.last_buy_amount * self._sell_fee
                     rounded_fee = round_up_to_one_significant(raw_fee)
                     custom_amount = self.state.last_buy_amount - rounded_fee
                     self.logger.debug(f"Calculated sell order amount from last buy order: {custom_amount} "
@@ -72,7 +96,9 @@ class OrderManager:
                 self.state.order_id = order.get('id', None)
                 return
             else:
-                delay = base_delay * (2 ** retries)
+                delay = min(self._backoff_cap, base_delay * (2 ** retries))
+                if time.monotonic() + delay > deadline:
+                    break
                 self.logger.error(f"Failed to place order; retrying in {delay:.2f} seconds...")
                 time.sleep(delay)
                 retries += 1
@@ -1,26 +1,7 @@
 import logging
 import time
-import math
-
-def round_up_to_one_significant(x):
-    """
-    Rounds a positive number up to one significant figure.
-    Examples:
-      801 -> 900
-      0.000801 -> 0.0009
-    """
-    if x == 0:
-        return 0
-    exponent = math.floor(math.log10(abs(x)))
-    factor = 10 ** exponent
-    first_digit = int(abs(x) / factor)
-    if abs(x) > first_digit * factor:
-        first_digit += 1
-        if first_digit == 10:
-            first_digit = 1
-            exponent += 1
-            factor = 10 ** exponent
-    return first_digit * factor
+from operator import itemgetter
+from order_manager import round_up_to_one_significant
 
 class ParallelOrderManager:
     def __init__(self, api, state, config, ws_manager):
@@ -40,8 +21,11 @@ class ParallelOrderManager:
         self.config = config
         self.ws_manager = ws_manager
         self.logger = logging.getLogger("ParallelOrderManager")
+        self._sell_fee = config['trading'].get('sell_trading_fee', 0.001)
 
     def place_new_orders(self, calculate_prices_func, get_market_price_func, total_instances):
+        # Price every free instance first, then send one frame per WebSocket connection
+        batches = {}
         for instance_index in range(total_instances):
             if instance_index in self.state.active_orders:
                 continue  # Skip if an active order already exists for this instance.
@@ -52,8 +36,7 @@ class ParallelOrderManager:
             custom_amount = None
             if order_type == 'sell':
                 if self.state.last_buy_amount is not None:
-                    fee_rate = self.config['trading'].get('sell_trading_fee', 0.001)
-                    raw_fee = self.state.last_buy_amount * fee_rate
+                    raw_fee = self.state.last_buy_amount * self._sell_fee
                     rounded_fee = round_up_to_one_significant(raw_fee)
                     custom_amount = self.state.last_buy_amount - rounded_fee
                     self.logger.debug(f"Instance {instance_index}: Calculated sell order amount: {custom_amount} "
@@ -63,21 +46,33 @@ class ParallelOrderManager:
                     continue
             amount = custom_amount if custom_amount is not None else self.api.calculate_order_amount(order_type, limit)
             ws_client = self.ws_manager.get_ws_client(instance_index)
-            order = ws_client.place_stop_limit_order_ws(order_type, trigger, limit, amount)
-            if not order:
-                self.logger.error(f"Instance {instance_index}: WebSocket order placement failed; falling back to API.")
-                order = self.api.place_stop_limit_order(order_type, trigger, limit, custom_amount=custom_amount)
-            if order:
-                self.logger.info(f"Instance {instance_index}: Order placed: {order}")
-                self.state.active_orders[instance_index] = {
-                    'order_id': order.get('id', None),
-                    'client_order_id': order.get('client_order_id'),
-                    'last_price': last_price,
-                    'limit_price': limit,
-                    'order_type': order_type
-                }
-            else:
-                self.logger.error(f"Instance {instance_index}: Failed to place order.")
+            batches.setdefault(ws_client, []).append(
+                (instance_index, order_type, last_price, trigger, limit, amount, custom_amount)
+            )
+
+        for ws_client, entries in batches.items():
+            order_type = entries[0][1]
+            orders = ws_client.place_stop_limit_orders_batch_ws(
+                order_type, [(trigger, limit, amount) for _, _, _, trigger, limit, amount, _ in entries]
+            ) or [None] * len(entries)
+            for (instance_index, order_type, last_price, trigger, limit, amount, custom_amount), order in zip(entries, orders):
+                if not order:
+                    self.logger.error(f"Instance {instance_index}: WebSocket order placement failed; falling back to API.")
+                    order = self.api.place_stop_limit_order(order_type, trigger, limit, custom_amount=custom_amount)
+                if order:
+                    self.logger.info(f"Instance {instance_index}: Order placed: {order}")
+                    self.state.active_orders[instance_index] = {
+                        'order_id': order.get('id', None),
+                        'client_order_id': order.get('client_order_id'),
+                        'last_price': last_price,
+                        'limit_price': limit,
+                        'order_type': order_type
+                    }
+                    # REST-fallback orders carry no client_order_id; never index them under None
+                    if cid := order.get('client_order_id'):
+                        self.state.cid_to_instance[cid] = instance_index
+                else:
+                    self.logger.error(f"Instance {instance_index}: Failed to place order.")
 
     def amend_order(self, instance_index, get_market_price_func, calculate_prices_func):
         order_state = self.state.active_orders.get(instance_index)
@@ -110,7 +105,7 @@ class ParallelOrderManager:
 
     def monitor_active_orders(self, get_market_price_func, calculate_prices_func):
         current_price = get_market_price_func()
-        for instance_index, order_state in list(self.state.active_orders.items()):
+        for instance_index, order_state in tuple(self.state.active_orders.items()):
             order_type = order_state.get('order_type')
             last_price = order_state.get('last_price')
             self.logger.debug(f"Instance {instance_index}: Monitoring order. Current price: {current_price}, Order price: {last_price}")
@@ -139,7 +134,7 @@ class ParallelOrderManager:
             self.logger.info(f"Buy order {order_id} executed. Amount: {executed_amount}")
 
         # Remove order from active_orders
-        del self.state.active_orders[order_id]
+        self.state.drop_order(order_id)
 
     def recover_state(self, instance_index=None):
         self.logger.info("Initiating recovery of order state for parallel orders.")
@@ -155,16 +150,16 @@ class ParallelOrderManager:
                         self.logger.error(f"Instance {instance_index}: Failed to cancel order {order_id} during recovery.")
                 except Exception as e:
                     self.logger.error(f"Instance {instance_index}: Recovery error: {str(e)}")
-                del self.state.active_orders[instance_index]
+                self.state.drop_order(instance_index)
         else:
-            for idx in list(self.state.active_orders.keys()):
+            for idx in tuple(self.state.active_orders):
                 self.recover_state(idx)
         self.logger.info("Recovery of parallel orders completed.")
 
     def graceful_shutdown(self):
         self.logger.info("Initiating graceful shutdown of bot-managed orders...")
         # Process buy orders: cancel them instantly.
-        for instance_index, order_state in list(self.state.active_orders.items()):
+        for instance_index, order_state in tuple(self.state.active_orders.items()):
             if order_state.get('order_type') == 'buy':
                 order_id = order_state.get('order_id')
                 self.logger.info(f"Instance {instance_index}: Cancelling bot-placed buy order {order_id}")
@@ -173,17 +168,19 @@ class ParallelOrderManager:
                     ws_client.cancel_order_ws(order_id)
                 except Exception as e:
                     self.logger.error(f"Instance {instance_index}: Failed to cancel buy order {order_id}: {e}")
-                del self.state.active_orders[instance_index]
+                self.state.drop_order(instance_index)
         
         # Process sell orders: cancel and replace with market orders sequentially.
-        sell_orders = []
-        for instance_index, order_state in self.state.active_orders.items():
-            if order_state.get('order_type') == 'sell':
-                sell_orders.append((instance_index, order_state))
+        # Sort key extracted once up front; ties fall back to instance_index, never to the dicts
+        sell_orders = [
+            (order_state.get('limit_price', float('inf')), instance_index, order_state)
+            for instance_index, order_state in tuple(self.state.active_orders.items())
+            if order_state.get('order_type') == 'sell'
+        ]
         
         if sell_orders:
-            sell_orders.sort(key=lambda x: x[1].get('limit_price', float('inf')))
-            for instance_index, order_state in sell_orders:
+            sell_orders.sort(key=itemgetter(0, 1))
+            for _, instance_index, order_state in sell_orders:
                 order_id = order_state.get('order_id')
                 limit_price = order_state.get('limit_price')
                 self.logger.info(f"Instance {instance_index}: Processing sell order {order_id} with limit price {limit_price}")
@@ -205,7 +202,6 @@ class ParallelOrderManager:
                 except Exception as e:
                     self.logger.error(f"Instance {instance_index}: Error during processing sell order: {e}")
                 finally:
-                    if instance_index in self.state.active_orders:
-                        del self.state.active_orders[instance_index]
+                    self.state.drop_order(instance_index)
         
         self.logger.info("Graceful shutdown complete. All bot-managed orders have been processed.")
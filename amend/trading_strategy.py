@@ -1,6 +1,7 @@
 import time
 import math
 import logging
+import threading
 from gateio_api import GateIOAPIClient
 from ws_manager import WSManager
 from order_manager import OrderManager
@@ -11,6 +12,14 @@ class OrderState:
         self.active_orders = {}   # key: instance_index, value: dict with order details
         self.order_type = 'buy'   # Starting order type
         self.last_buy_amount = None  # To store executed buy amount (for sell orders)
+        self.cid_to_instance = {}  # key: client_order_id, value: instance_index
+
+    def drop_order(self, key):
+        """Remove an active order together with its client_order_id index entry."""
+        order = self.active_orders.pop(key, None)
+        if order:
+            self.cid_to_instance.pop(order.get('client_order_id'), None)
+        return order
 
 class TradingStrategy:
     def __init__(self, config):
@@ -18,6 +27,7 @@ class TradingStrategy:
         self.api = GateIOAPIClient(config)
         self.state = OrderState()
         self.logger = logging.getLogger("TradingStrategy")
+        self._price_ready = threading.Event()
 
         # Fetch initial market price via REST API
         self.logger.info("Fetching initial market price...")
@@ -31,6 +41,14 @@ class TradingStrategy:
         else:
             price_precision = self.config['trading'].get('fallback_price_precision')
         self.tick_size = 10 ** (-price_precision)
+        self._price_decimals = -int(math.log10(self.tick_size))
+        # Adjustments are fixed for the session; keep them pre-scaled to price units
+        buy_cfg = self.config['trading']['buy']
+        sell_cfg = self.config['trading']['sell']
+        self._buy_trig = buy_cfg['trigger_price_adjust'] * self.tick_size
+        self._buy_lim = buy_cfg['limit_price_adjust'] * self.tick_size
+        self._sell_trig = sell_cfg['trigger_price_adjust'] * self.tick_size
+        self._sell_lim = sell_cfg['limit_price_adjust'] * self.tick_size
         self.logger.info(f"Determined tick size: {self.tick_size} (precision: {price_precision} digits)")
 
         # Determine the number of parallel order instances (fixed or dynamic)
@@ -54,6 +72,7 @@ class TradingStrategy:
         # Instantiate order managers with the WSManager for primary order management.
         self.order_manager = OrderManager(self.api, self.state, self.config, self.ws_manager)
         self.parallel_order_manager = ParallelOrderManager(self.api, self.state, self.config, self.ws_manager)
+        self._poll_interval = self.config['trading']['price_poll_interval']
 
     def _fetch_initial_price(self):
         try:
@@ -67,6 +86,7 @@ class TradingStrategy:
 
     def update_price(self, price):
         self.current_price = price
+        self._price_ready.set()
         self.logger.debug(f"Price updated via callback: {price}")
 
     def on_order_event(self, order_id, event):
@@ -76,15 +96,17 @@ class TradingStrategy:
         status = event.get('status')
         self.logger.debug(f"Order event received for {order_id}: {event}")
 
+        # Resolve the owning instance in O(1); orders placed outside the bot stay keyed by order_id
+        key = self.state.cid_to_instance.get(event.get('client_order_id'), order_id)
+
         # Remove from active_orders if order is completed
         if status in ["closed", "filled", "canceled"]:
-            if order_id in self.state.active_orders:
-                del self.state.active_orders[order_id]
+            self.state.drop_order(key)
             self.logger.info(f"Order {order_id} executed with status: {status}")
     
         # Update active_orders with real order data
         if status == "open":
-            self.state.active_orders[order_id] = {
+            self.state.active_orders.setdefault(key, {}).update({
                 'order_id': order_id,
                 'symbol': event.get('symbol'),
                 'side': event.get('side'),
@@ -92,37 +114,29 @@ class TradingStrategy:
                 'amount': float(event.get('amount')),
                 'filled': float(event.get('filled', 0.0)),
                 'status': status
-                }
+                })
 
     def _calculate_prices(self, last_price, order_type, instance_index=0):
         self.logger.debug(f"Calculating prices for {order_type} order with last price: {last_price} for instance {instance_index}")
-        tick_size = self.tick_size
+        step = instance_index * self.tick_size
         if order_type == 'buy':
-            base_trigger = self.config['trading']['buy']['trigger_price_adjust']
-            base_limit = self.config['trading']['buy']['limit_price_adjust']
-            trigger = last_price + ((base_trigger + instance_index) * tick_size)
-            limit = last_price + ((base_limit + instance_index) * tick_size)
+            trigger = last_price + self._buy_trig + step
+            limit = last_price + self._buy_lim + step
         elif order_type == 'sell':
-            base_trigger = self.config['trading']['sell']['trigger_price_adjust']
-            base_limit = self.config['trading']['sell']['limit_price_adjust']
-            trigger = last_price - ((base_trigger + instance_index) * tick_size)
-            limit = last_price - ((base_limit + instance_index) * tick_size)
+            trigger = last_price - self._sell_trig - step
+            limit = last_price - self._sell_lim - step
         else:
             raise ValueError("Invalid order type specified")
-        decimal_places = -int(math.log10(tick_size))
-        trigger = round(trigger, decimal_places)
-        limit = round(limit, decimal_places)
+        trigger = round(trigger, self._price_decimals)
+        limit = round(limit, self._price_decimals)
         self.logger.debug(f"Instance {instance_index}: Calculated trigger: {trigger}, limit: {limit}")
         return trigger, limit
 
     def _get_market_price(self):
         self.logger.debug("Fetching current market price...")
-        start_time = time.time()
-        while self.current_price is None:
-            if time.time() - start_time > 5:
-                self.logger.error("No price update received from WebSocket within 5 seconds.")
-                break
-            time.sleep(0.01)
+        # Wakes as soon as update_price delivers the first tick instead of polling
+        if self.current_price is None and not self._price_ready.wait(timeout=5):
+            self.logger.error("No price update received from WebSocket within 5 seconds.")
         self.logger.debug(f"Current market price is: {self.current_price}")
         return self.current_price
 
@@ -130,12 +144,15 @@ class TradingStrategy:
         fixed_instances = self.config['trading'].get('parallel_instances')
         if fixed_instances:
             return fixed_instances
-        price_str = f"{current_price:.8f}"
-        digits = [c for c in price_str if c.isdigit() and c != '0']
-        if len(digits) < 2:
-            significant = float(price_str)
-        else:
-            significant = float(f"{digits[0]}.{digits[1]}")
+        # First two significant digits as d.d (0.0004567 -> 4.5), at 8-decimal resolution
+        price = round(current_price, 8)
+        exponent = math.floor(math.log10(price))
+        two_digits = int(price / 10.0 ** (exponent - 1) + 1e-9)
+        if two_digits >= 100:    # log10 landed just below a power of ten
+            two_digits //= 10
+        elif two_digits < 10:    # log10 landed just above one
+            two_digits = int(price / 10.0 ** (exponent - 2) + 1e-9)
+        significant = two_digits / 10
         multiplier = self.config['trading'].get('dynamic_multiplier', 24)
         product = significant * multiplier
         instances = int(product) if product == int(product) else int(product) + 1
@@ -144,25 +161,26 @@ class TradingStrategy:
     def manage_strategy(self):
         trade_count = 0
         max_trades = self.config['trading'].get('trade_limit')
+        # Bound once; the loop body then only touches locals
+        poll_interval = self._poll_interval
+        active_orders = self.state.active_orders
+        place = self.parallel_order_manager.place_new_orders
+        monitor = self.parallel_order_manager.monitor_active_orders
+        calculate_prices = self._calculate_prices
+        get_market_price = self._get_market_price
+        instances = self.parallel_instances
         self.logger.info("Starting strategy management loop.")
         while True:
             if max_trades is not None and trade_count >= max_trades:
                 self.logger.info("Trade limit reached. Exiting trading loop.")
                 break
             try:
-                if not self.state.active_orders:
+                if not active_orders:
                     self.logger.info("No active orders - placing new parallel orders")
-                    self.parallel_order_manager.place_new_orders(
-                        self._calculate_prices,
-                        self._get_market_price,
-                        self.parallel_instances
-                    )
+                    place(calculate_prices, get_market_price, instances)
                 else:
-                    self.parallel_order_manager.monitor_active_orders(
-                        self._get_market_price,
-                        self._calculate_prices
-                    )
-                time.sleep(self.config['trading']['price_poll_interval'])
+                    monitor(get_market_price, calculate_prices)
+                time.sleep(poll_interval)
                 trade_count += 1
             except KeyboardInterrupt:
                 self.logger.info("Stopped by user")
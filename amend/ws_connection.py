@@ -1,39 +1,60 @@
 import time
-import json
+import orjson
 import threading
 import logging
+import socket
 import websocket
 import hashlib
 import hmac
 import uuid
+from collections import OrderedDict
+
+# Order frames are small and latency-critical: never let Nagle hold them back
+_SOCKET_OPTIONS = ((socket.IPPROTO_TCP, socket.TCP_NODELAY, 1),)
+if hasattr(socket, 'TCP_QUICKACK'):
+    _SOCKET_OPTIONS += ((socket.IPPROTO_TCP, socket.TCP_QUICKACK, 1),)
 
 class GateIOWebSocketConnection:
-    def __init__(self, currency_pair, on_price_callback, on_order_callback, api_key, api_secret, config=None):
+    def __init__(self, currency_pair, on_price_callback, on_order_callback, api_key, api_secret, config=None,
+                 subscribe_tickers=True):
         if len(api_key) != 32 or len(api_secret) != 64:
             raise ValueError("Invalid API credentials format")
         self.api_key = api_key
         self.api_secret = api_secret
+        self._secret_bytes = api_secret.encode('utf-8')
         # Use a simplified symbol format (remove underscores)
         self.currency_pair = currency_pair.replace('_', '')
         self.on_price_callback = on_price_callback
         self.on_order_callback = on_order_callback  # Global callback for order events
+        self.subscribe_tickers = subscribe_tickers  # Only one connection per manager needs the ticker stream
         self.ws_url = "wss://ws.gate.io/v4"
         self.ws = None
         self.thread = None
-        self.price_lock = threading.Lock()
         self.current_price = None
         self.logger = logging.getLogger("GateIOWebSocketConnection")
         self.logger.info(f"WebSocket connection initialized for {self.currency_pair}")
         self.config = config if config else {}
         
-        # Dictionary to track pending orders by unique client_order_id.
-        self.pending_orders = {}
-        self.pending_orders_lock = threading.Lock()
+        # Pending order callbacks by unique client_order_id, oldest first. Orders that never get a
+        # created event would otherwise leave their callback behind forever, so the map is bounded.
+        # No lock: single-key insert, pop and popitem are each atomic under the GIL.
+        self.pending_orders = OrderedDict()
+        self.max_pending_orders = self.config.get('max_pending_orders', 10000)
+
+    def add_pending_order(self, client_order_id, callback):
+        pending_orders = self.pending_orders
+        pending_orders[client_order_id] = callback
+        if len(pending_orders) > self.max_pending_orders:
+            try:
+                stale_id, _ = pending_orders.popitem(last=False)
+            except KeyError:  # the receiver emptied it in between
+                return
+            self.logger.warning(f"Dropping stale pending order callback for {stale_id}")
 
     def on_message(self, ws, message):
         self.logger.debug(f"Received message: {message}")
         try:
-            data = json.loads(message)
+            data = orjson.loads(message)
             channel = data.get('channel')
             event = data.get('event')
             # Process ticker updates.
@@ -45,8 +66,8 @@ class GateIOWebSocketConnection:
                     return
                 try:
                     price = float(last_price)
-                    with self.price_lock:
-                        self.current_price = price
+                    # Single writer (this thread); a plain attribute store is atomic under the GIL
+                    self.current_price = price
                     self.logger.debug(f"Updated current price: {price}")
                     if self.on_price_callback:
                         self.on_price_callback(price)
@@ -60,8 +81,7 @@ class GateIOWebSocketConnection:
                 client_order_id = result.get('client_order_id')
                 if event == 'order.created':
                     self.logger.info(f"Order created: {result}")
-                    with self.pending_orders_lock:
-                        callback = self.pending_orders.pop(client_order_id, None)
+                    callback = self.pending_orders.pop(client_order_id, None)
                     if callback:
                         callback(order_id, result)
                     else:
@@ -86,30 +106,31 @@ class GateIOWebSocketConnection:
         try:
             timestamp = int(time.time())
             # Subscribe to tickers.
-            ticker_payload = f"channel=spot.tickers&event=subscribe&time={timestamp}"
-            ticker_signature = hmac.new(
-                self.api_secret.encode('utf-8'),
-                ticker_payload.encode('utf-8'),
-                hashlib.sha512
-            ).hexdigest()
-            ticker_sub_msg = {
-                "time": timestamp,
-                "channel": "spot.tickers",
-                "event": "subscribe",
-                "payload": [self.currency_pair],
-                "auth": {
-                    "method": "api_key",
-                    "KEY": self.api_key,
-                    "SIGN": ticker_signature
+            if self.subscribe_tickers:
+                ticker_payload = f"channel=spot.tickers&event=subscribe&time={timestamp}"
+                ticker_signature = hmac.new(
+                    self._secret_bytes,
+                    ticker_payload.encode('utf-8'),
+                    hashlib.sha512
+                ).hexdigest()
+                ticker_sub_msg = {
+                    "time": timestamp,
+                    "channel": "spot.tickers",
+                    "event": "subscribe",
+                    "payload": [self.currency_pair],
+                    "auth": {
+                        "method": "api_key",
+                        "KEY": self.api_key,
+                        "SIGN": ticker_signature
+                    }
                 }
-            }
-            ws.send(json.dumps(ticker_sub_msg))
-            self.logger.info("Ticker subscription message sent.")
+                ws.send(orjson.dumps(ticker_sub_msg))
+                self.logger.info("Ticker subscription message sent.")
 
             # Subscribe to order updates.
             order_payload = f"channel=spot.orders&event=subscribe&time={timestamp}"
             order_signature = hmac.new(
-                self.api_secret.encode('utf-8'),
+                self._secret_bytes,
                 order_payload.encode('utf-8'),
                 hashlib.sha512
             ).hexdigest()
@@ -124,7 +145,7 @@ class GateIOWebSocketConnection:
                     "SIGN": order_signature
                 }
             }
-            ws.send(json.dumps(order_sub_msg))
+            ws.send(orjson.dumps(order_sub_msg))
             self.logger.info("Order subscription message sent.")
         except Exception as e:
             self.logger.error(f"Subscription failed: {str(e)}")
@@ -139,6 +160,7 @@ class GateIOWebSocketConnection:
             on_close=self.on_close
         )
         self.ws.run_forever(
+            sockopt=_SOCKET_OPTIONS,
             ping_interval=30,
             ping_timeout=10,
             ping_payload="keepalive"
@@ -165,7 +187,7 @@ class GateIOWebSocketConnection:
         """Utility method to send a JSON message over the active WebSocket connection."""
         try:
             if self.ws:
-                self.ws.send(json.dumps(message))
+                self.ws.send(orjson.dumps(message))
             else:
                 self.logger.error("WebSocket connection not established.")
         except Exception as e:
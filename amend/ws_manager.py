@@ -28,7 +28,9 @@ class WSManager:
                 on_order_callback=self.on_order_callback,
                 api_key=self.api_key,
                 api_secret=self.api_secret,
-                config=self.config
+                config=self.config,
+                # The pair's ticker is the same on every connection; one stream feeds the price callback
+                subscribe_tickers=(i == 0)
             )
             ws_connection.start()
             # Wrap the connection with order functionalities
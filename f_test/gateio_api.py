@@ -41,6 +41,27 @@ class GateIOAPIClient:
             self.logger.error(f"Cancel Error for order {order_id}: {str(e)}")
             return False
 
+    def cancel_orders(self, order_ids):
+        """
+        Cancel several orders in one request where the exchange supports it.
+        Returns the set of order ids that were cancelled.
+        """
+        self.logger.debug(f"Attempting to cancel {len(order_ids)} orders in one request")
+        if not self.exchange.has.get('cancelOrders'):
+            return {order_id for order_id in order_ids if self.cancel_order(order_id)}
+        try:
+            results = self.exchange.cancel_orders(list(order_ids), self.symbol)
+            # Gate.io reports per-order success; failed entries come back with succeeded=false
+            cancelled = {
+                result['id'] for result in results
+                if result.get('info', {}).get('succeeded', True) is not False
+            }
+            self.logger.info(f"Cancelled {len(cancelled)}/{len(order_ids)} orders.")
+            return cancelled
+        except Exception as e:
+            self.logger.error(f"Batch cancel error: {str(e)}")
+            return set()
+
     def calculate_order_amount(self, side, limit_price, custom_amount=None):
         """
         For buy orders, convert the fixed USDT value (configured in 'buy.fixed_usdt')
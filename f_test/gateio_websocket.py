@@ -1,62 +1,117 @@
+import os
+import sys
 import time
-import json
+import orjson
 import threading
 import logging
+import socket
 import websocket
 import hashlib
 import hmac
+from binascii import hexlify
+
+# Ticker frames are small and latency-critical: never let Nagle or delayed ACKs hold them back
+_SOCKET_OPTIONS = ((socket.IPPROTO_TCP, socket.TCP_NODELAY, 1),)
+if hasattr(socket, 'TCP_QUICKACK'):
+    _SOCKET_OPTIONS += ((socket.IPPROTO_TCP, socket.TCP_QUICKACK, 1),)
+# Not exported by the socket module; the value is fixed in the Linux ABI
+_SO_BUSY_POLL = getattr(socket, 'SO_BUSY_POLL', 46 if sys.platform.startswith('linux') else None)
 
 class GateIOWebSocketClient:
-    def __init__(self, currency_pair, on_price_callback, on_order_callback, api_key, api_secret):
+    def __init__(self, currency_pair, on_price_callback, on_order_callback, api_key, api_secret,
+                 busy_poll_us=None, cpu_affinity=None):
         if len(api_key) != 32 or len(api_secret) != 64:
             raise ValueError("Invalid API credentials format")
         self.api_key = api_key
         self.api_secret = api_secret
+        self._secret_bytes = api_secret.encode('utf-8')
+        # Keyed once; each signature copies the precomputed inner/outer SHA-512 states
+        self._hmac_template = hmac.new(self._secret_bytes, digestmod=hashlib.sha512)
         # Remove underscores from currency pair (e.g. BTC_USDT -> BTCUSDT)
         self.currency_pair = currency_pair.replace('_', '')
         self.on_price_callback = on_price_callback
         self.on_order_callback = on_order_callback  # Callback for order events
         self.ws_url = "wss://ws.gate.io/v4"
+        self.busy_poll_us = busy_poll_us  # SO_BUSY_POLL budget for the socket, in microseconds
+        self.cpu_affinity = cpu_affinity  # CPU to pin the receive thread to
         self.ws = None
         self.thread = None
-        self.price_lock = threading.Lock()
+        # Written only by the receive thread and update_price; a float rebind is atomic, so no lock
         self.current_price = None
+        # Subscribe frames differ only in time and signature between reconnects, so the rest is
+        # encoded once here and those two fields are patched in by on_open
+        auth_key = orjson.dumps(api_key)
+        self._ticker_sub_template = (
+            b'{"time":%%d,"channel":"spot.tickers","event":"subscribe","payload":[%s],'
+            b'"auth":{"method":"api_key","KEY":%s,"SIGN":"%%s"}}' % (orjson.dumps(self.currency_pair), auth_key)
+        )
+        self._order_sub_template = (
+            b'{"time":%%d,"channel":"spot.orders","event":"subscribe","payload":[],'
+            b'"auth":{"method":"api_key","KEY":%s,"SIGN":"%%s"}}' % auth_key
+        )
         self.logger = logging.getLogger("GateIOWebSocketClient")
+        # Read once; logging is configured before the client is built
+        self._dbg = self.logger.isEnabledFor(logging.DEBUG)
         self.logger.info(f"WebSocket client initialized for {self.currency_pair}")
 
+    def _sign(self, payload):
+        mac = self._hmac_template.copy()
+        mac.update(payload.encode('utf-8'))
+        # Hex as bytes, ready to drop into the pre-encoded subscribe templates
+        return hexlify(mac.digest())
+
     def on_message(self, ws, message):
-        self.logger.debug(f"Received message: {message}")
+        if self._dbg:
+            self.logger.debug("Received message: %s", message)
+        # Only the prefilter, decode and field lookups can fail on a malformed frame, so only they
+        # are guarded; callback errors propagate to websocket-client, which reports them via on_error
         try:
-            data = json.loads(message)
-            channel = data.get('channel')
-            event = data.get('event')
+            # run() passes skip_utf8_validation=True, so websocket-client delivers text frames as
+            # raw bytes; anything handed in as str (e.g. by a caller outside the run loop) is
+            # brought to the same type once here
+            if isinstance(message, str):
+                message = message.encode()
+            # Only update events are acted on; subscribe acks and other replies can't contain
+            # the quoted token, so they are dropped without being parsed
+            if b'"update"' not in message:
+                self.logger.debug("Message ignored: not a subscribed event update.")
+                return
+            data = orjson.loads(message)
+            # Update frames always carry channel/event/result, so index them directly
+            channel = data['channel']
+            event = data['event']
+            result = data['result']
             if channel == 'spot.tickers' and event == 'update':
-                result = data.get('result', {})
                 last_price = result.get('last')
-                if not last_price:
-                    self.logger.debug("No last price found in the message.")
-                    return
-                try:
-                    price = float(last_price)
-                    with self.price_lock:
-                        self.current_price = price
-                    self.logger.debug(f"Updated current price: {price}")
-                    self.on_price_callback(price)
-                except (ValueError, TypeError) as e:
-                    self.logger.error(f"Price parse error: {e}")
             elif channel == 'spot.orders' and event == 'update':
-                result = data.get('result', {})
                 order_id = result.get('order_id')
                 status = result.get('status')
-                self.logger.debug(f"Order update received: Order ID: {order_id}, Status: {status}")
-                if status in ["closed", "filled"]:
-                    self.logger.info(f"Order {order_id} executed with status: {status}")
-                    if self.on_order_callback:
-                        self.on_order_callback(result)
             else:
                 self.logger.debug("Message ignored: not a subscribed event update.")
-        except Exception as e:
+                return
+        except (orjson.JSONDecodeError, KeyError, TypeError, AttributeError, UnicodeError) as e:
             self.logger.error(f"Message processing failed: {e}")
+            return
+        if channel == 'spot.tickers':
+            if not last_price:
+                self.logger.debug("No last price found in the message.")
+                return
+            try:
+                price = float(last_price)
+            except (ValueError, TypeError) as e:
+                self.logger.error(f"Price parse error: {e}")
+                return
+            self.current_price = price
+            if self._dbg:
+                self.logger.debug("Updated current price: %s", price)
+            self.on_price_callback(price)
+        else:
+            if self._dbg:
+                self.logger.debug("Order update received: Order ID: %s, Status: %s", order_id, status)
+            if status in ["closed", "filled"]:
+                self.logger.info(f"Order {order_id} executed with status: {status}")
+                if self.on_order_callback:
+                    self.on_order_callback(result)
 
     def on_error(self, ws, error):
         self.logger.error(f"WebSocket Error: {error}")
@@ -66,46 +121,22 @@ class GateIOWebSocketClient:
 
     def on_open(self, ws):
         self.logger.info("WebSocket connection opened, sending subscription messages.")
+        if self.busy_poll_us and _SO_BUSY_POLL is not None:
+            # Raising it above net.core.busy_read needs CAP_NET_ADMIN, so a refusal is not fatal
+            try:
+                ws.sock.sock.setsockopt(socket.SOL_SOCKET, _SO_BUSY_POLL, self.busy_poll_us)
+            except OSError as e:
+                self.logger.warning(f"SO_BUSY_POLL not applied: {e}")
         try:
             timestamp = int(time.time())
             ticker_payload = f"channel=spot.tickers&event=subscribe&time={timestamp}"
-            ticker_signature = hmac.new(
-                self.api_secret.encode('utf-8'),
-                ticker_payload.encode('utf-8'),
-                hashlib.sha512
-            ).hexdigest()
-            ticker_sub_msg = {
-                "time": timestamp,
-                "channel": "spot.tickers",
-                "event": "subscribe",
-                "payload": [self.currency_pair],
-                "auth": {
-                    "method": "api_key",
-                    "KEY": self.api_key,
-                    "SIGN": ticker_signature
-                }
-            }
-            ws.send(json.dumps(ticker_sub_msg))
+            ticker_signature = self._sign(ticker_payload)
+            ws.send(self._ticker_sub_template % (timestamp, ticker_signature))
             self.logger.info("Ticker subscription message sent.")
 
             order_payload = f"channel=spot.orders&event=subscribe&time={timestamp}"
-            order_signature = hmac.new(
-                self.api_secret.encode('utf-8'),
-                order_payload.encode('utf-8'),
-                hashlib.sha512
-            ).hexdigest()
-            order_sub_msg = {
-                "time": timestamp,
-                "channel": "spot.orders",
-                "event": "subscribe",
-                "payload": [],
-                "auth": {
-                    "method": "api_key",
-                    "KEY": self.api_key,
-                    "SIGN": order_signature
-                }
-            }
-            ws.send(json.dumps(order_sub_msg))
+            order_signature = self._sign(order_payload)
+            ws.send(self._order_sub_template % (timestamp, order_signature))
             self.logger.info("Order subscription message sent.")
         except Exception as e:
             self.logger.error(f"Subscription failed: {str(e)}")
@@ -119,20 +150,28 @@ class GateIOWebSocketClient:
             on_error=self.on_error,
             on_close=self.on_close
         )
+        # Gate.io only sends JSON text; the pure-Python UTF-8 check is wasted work on every frame.
+        # With it skipped, on_message receives text frames as bytes, not str.
         self.ws.run_forever(
+            sockopt=_SOCKET_OPTIONS,
+            skip_utf8_validation=True,
             ping_interval=30,
             ping_timeout=10,
             ping_payload="keepalive"
         )
 
     def update_price(self, price):
-        with self.price_lock:
-            self.current_price = price
+        self.current_price = price
         self.logger.debug(f"Price manually updated to: {price}")
 
     def start(self):
         self.logger.info("Starting WebSocket thread...")
         def run_forever():
+            if self.cpu_affinity is not None and hasattr(os, 'sched_setaffinity'):
+                try:
+                    os.sched_setaffinity(0, {self.cpu_affinity})
+                except OSError as e:
+                    self.logger.warning(f"Could not pin WebSocket thread to CPU {self.cpu_affinity}: {e}")
             retry_count = 0
             while True:
                 try:
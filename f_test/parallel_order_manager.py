@@ -1,11 +1,26 @@
 import logging
+import threading
 import time
+from bisect import bisect_left, insort
+from concurrent.futures import ThreadPoolExecutor
+from itertools import repeat
+
+class OrderRecord:
+    """Per-instance order details; slotted so the monitor/shutdown loops read plain attributes."""
+    __slots__ = ('order_id', 'last_price', 'limit_price', 'order_type', 'executed_amount')
+
+    def __init__(self, order_id, last_price, limit_price, order_type, executed_amount=None):
+        self.order_id = order_id
+        self.last_price = last_price
+        self.limit_price = limit_price  # Stored for shutdown ordering
+        self.order_type = order_type
+        self.executed_amount = executed_amount
 
 class ParallelOrderManager:
     def __init__(self, api, state, config):
         """
         The state object is expected to have an 'active_orders' dictionary,
-        where each key is an instance index and its value is a dictionary containing:
+        where each key is an instance index and its value is an OrderRecord holding:
           - order_id: the ID of the placed order
           - last_price: the market price when the order was placed
           - limit_price: the calculated limit price for that order
@@ -17,6 +32,54 @@ class ParallelOrderManager:
         self.state = state
         self.config = config
         self.logger = logging.getLogger("ParallelOrderManager")
+        # Read once; logging is configured before the manager is built
+        self._dbg = self.logger.isEnabledFor(logging.DEBUG)
+        # Replacement orders are independent REST round trips; overlap them instead of serialising
+        self.executor = ThreadPoolExecutor(thread_name_prefix="ParallelOrder")
+        # Live sell orders as (limit_price, instance_index), kept sorted so shutdown needs no sort
+        self._sell_index = []
+        # Guards every active_orders/_sell_index mutation; held only for in-memory work, never
+        # across REST calls. Code that walks active_orders without it must iterate a snapshot.
+        self._orders_lock = threading.Lock()
+
+    def _store_order(self, instance_index, record):
+        with self._orders_lock:
+            self._unindex_sell(instance_index)
+            self.state.active_orders[instance_index] = record
+            if record.order_type == 'sell':
+                insort(self._sell_index, (record.limit_price, instance_index))
+
+    def _update_order(self, instance_index, order_id, last_price, limit_price, order_type):
+        # Reuse the instance's record when there is one instead of dropping and reinserting it
+        with self._orders_lock:
+            record = self.state.active_orders.get(instance_index)
+            if record is None or record.order_type != order_type:
+                self._unindex_sell(instance_index)
+                record = self.state.active_orders[instance_index] = OrderRecord(order_id, last_price, limit_price, order_type)
+            else:
+                self._unindex_sell(instance_index)
+                record.order_id = order_id
+                record.last_price = last_price
+                record.limit_price = limit_price
+            if order_type == 'sell':
+                insort(self._sell_index, (limit_price, instance_index))
+
+    def _drop_order(self, instance_index):
+        with self._orders_lock:
+            self._drop_locked(instance_index)
+
+    def _drop_locked(self, instance_index):
+        self._unindex_sell(instance_index)
+        self.state.active_orders.pop(instance_index, None)
+
+    def _unindex_sell(self, instance_index):
+        # Caller holds _orders_lock
+        record = self.state.active_orders.get(instance_index)
+        if record is not None and record.order_type == 'sell':
+            key = (record.limit_price, instance_index)
+            position = bisect_left(self._sell_index, key)
+            if position < len(self._sell_index) and self._sell_index[position] == key:
+                del self._sell_index[position]
 
     def place_new_orders(self, calculate_prices_func, get_market_price_func, total_instances):
         """
@@ -35,19 +98,15 @@ class ParallelOrderManager:
                 if self.state.last_buy_amount is not None:
                     fee = 0.001  # 0.1% trading fee
                     custom_amount = self.state.last_buy_amount * (1 - fee)
-                    self.logger.debug(f"Instance {instance_index}: Calculated sell order amount: {custom_amount}")
+                    if self._dbg:
+                        self.logger.debug("Instance %d: Calculated sell order amount: %s", instance_index, custom_amount)
                 else:
                     self.logger.error(f"Instance {instance_index}: No last buy amount available for sell order; skipping.")
                     continue
             order = self.api.place_stop_limit_order(order_type, trigger, limit, custom_amount=custom_amount)
             if order:
                 self.logger.info(f"Instance {instance_index}: Order placed: {order}")
-                self.state.active_orders[instance_index] = {
-                    'order_id': order['id'],
-                    'last_price': last_price,
-                    'limit_price': limit,  # Store limit price for shutdown ordering
-                    'order_type': order_type
-                }
+                self._store_order(instance_index, OrderRecord(order['id'], last_price, limit, order_type))
             else:
                 self.logger.error(f"Instance {instance_index}: Failed to place order.")
 
@@ -58,18 +117,48 @@ class ParallelOrderManager:
         cancel and replace the order for that specific instance.
         """
         current_price = get_market_price_func()
-        for instance_index, order_state in list(self.state.active_orders.items()):
-            order_type = order_state.get('order_type')
-            last_price = order_state.get('last_price')
-            self.logger.debug(f"Instance {instance_index}: Monitoring order. Current price: {current_price}, Order price: {last_price}")
-            if order_type == 'buy' and current_price < last_price:
-                self.logger.info(f"Instance {instance_index}: Price dropped below order price; cancelling buy order.")
-                self.cancel_and_replace(instance_index, get_market_price_func, calculate_prices_func)
-            elif order_type == 'sell' and current_price > last_price:
-                self.logger.info(f"Instance {instance_index}: Price rose above order price; cancelling sell order.")
-                self.cancel_and_replace(instance_index, get_market_price_func, calculate_prices_func)
+        to_replace = []
+        dbg = self._dbg
+        with self._orders_lock:
+            for instance_index, order_state in self.state.active_orders.items():
+                order_type = order_state.order_type
+                last_price = order_state.last_price
+                if dbg:
+                    self.logger.debug("Instance %d: Monitoring order. Current price: %s, Order price: %s",
+                                      instance_index, current_price, last_price)
+                if order_type == 'buy' and current_price < last_price:
+                    self.logger.info(f"Instance {instance_index}: Price dropped below order price; cancelling buy order.")
+                    to_replace.append(instance_index)
+                elif order_type == 'sell' and current_price > last_price:
+                    self.logger.info(f"Instance {instance_index}: Price rose above order price; cancelling sell order.")
+                    to_replace.append(instance_index)
+                elif dbg:
+                    self.logger.debug("Instance %d: No conditions met for cancellation.", instance_index)
+        if to_replace:
+            self.cancel_and_replace_batch(to_replace, get_market_price_func, calculate_prices_func)
+
+    def cancel_and_replace_batch(self, instance_indices, get_market_price_func, calculate_prices_func):
+        """
+        Cancel the orders of several instances with a single request, then place all
+        replacements concurrently.
+        """
+        records = [(i, self.state.active_orders.get(i)) for i in instance_indices]
+        records = [(i, order_state) for i, order_state in records if order_state]
+        cancelled = self.api.cancel_orders([order_state.order_id for _, order_state in records])
+        replace_indices, replace_types = [], []
+        for instance_index, order_state in records:
+            if order_state.order_id in cancelled:
+                replace_indices.append(instance_index)
+                replace_types.append(order_state.order_type)
             else:
-                self.logger.debug(f"Instance {instance_index}: No conditions met for cancellation.")
+                self.logger.error(f"Instance {instance_index}: Cancellation of order {order_state.order_id} failed.")
+        list(self.executor.map(
+            self._replace_order,
+            replace_indices,
+            replace_types,
+            repeat(get_market_price_func),
+            repeat(calculate_prices_func)
+        ))
 
     def cancel_and_replace(self, instance_index, get_market_price_func, calculate_prices_func):
         """
@@ -79,34 +168,32 @@ class ParallelOrderManager:
         if not order_state:
             self.logger.error(f"Instance {instance_index}: No active order found to cancel.")
             return
-        order_id = order_state.get('order_id')
-        order_type = order_state.get('order_type')
+        order_id = order_state.order_id
+        order_type = order_state.order_type
         self.logger.info(f"Instance {instance_index}: Cancelling order {order_id} and replacing it.")
+        if self.api.cancel_order(order_id):
+            self._replace_order(instance_index, order_type, get_market_price_func, calculate_prices_func)
+        else:
+            self.logger.error(f"Instance {instance_index}: Cancellation of order {order_id} failed.")
+
+    def _replace_order(self, instance_index, order_type, get_market_price_func, calculate_prices_func):
         try:
-            if self.api.cancel_order(order_id):
-                new_price = get_market_price_func()
-                trigger, limit = calculate_prices_func(new_price, order_type, instance_index)
-                custom_amount = None
-                if order_type == 'sell':
-                    if self.state.last_buy_amount is not None:
-                        fee = 0.001
-                        custom_amount = self.state.last_buy_amount * (1 - fee)
-                    else:
-                        self.logger.error(f"Instance {instance_index}: No last buy amount available for sell order; cannot replace.")
-                        return
-                new_order = self.api.place_stop_limit_order(order_type, trigger, limit, custom_amount=custom_amount)
-                if new_order:
-                    self.logger.info(f"Instance {instance_index}: Replaced order successfully: {new_order}")
-                    self.state.active_orders[instance_index] = {
-                        'order_id': new_order['id'],
-                        'last_price': new_price,
-                        'limit_price': limit,
-                        'order_type': order_type
-                    }
+            new_price = get_market_price_func()
+            trigger, limit = calculate_prices_func(new_price, order_type, instance_index)
+            custom_amount = None
+            if order_type == 'sell':
+                if self.state.last_buy_amount is not None:
+                    fee = 0.001
+                    custom_amount = self.state.last_buy_amount * (1 - fee)
                 else:
-                    self.logger.error(f"Instance {instance_index}: Failed to place replacement order.")
+                    self.logger.error(f"Instance {instance_index}: No last buy amount available for sell order; cannot replace.")
+                    return
+            new_order = self.api.place_stop_limit_order(order_type, trigger, limit, custom_amount=custom_amount)
+            if new_order:
+                self.logger.info(f"Instance {instance_index}: Replaced order successfully: {new_order}")
+                self._update_order(instance_index, new_order['id'], new_price, limit, order_type)
             else:
-                self.logger.error(f"Instance {instance_index}: Cancellation of order {order_id} failed.")
+                self.logger.error(f"Instance {instance_index}: Failed to place replacement order.")
         except Exception as e:
             self.logger.error(f"Instance {instance_index}: Error during cancel and replace: {str(e)}")
             self.recover_state(instance_index)
@@ -122,7 +209,7 @@ class ParallelOrderManager:
         if not order_state:
             self.logger.error(f"Instance {instance_index}: No active order state found for execution event.")
             return
-        order_type = order_state.get('order_type')
+        order_type = order_state.order_type
         if order_type == 'buy':
             executed_amount = 0
             if 'filled' in execution_event:
@@ -136,15 +223,14 @@ class ParallelOrderManager:
                 except Exception as e:
                     self.logger.error(f"Instance {instance_index}: Error parsing amount: {e}")
             # Store executed amount for this instance and update global last_buy_amount.
-            order_state['executed_amount'] = executed_amount
+            order_state.executed_amount = executed_amount
             self.state.last_buy_amount = executed_amount
             self.logger.info(f"Instance {instance_index}: Stored executed buy amount: {executed_amount}")
         # Flip order type for this instance (buy becomes sell and vice versa)
         new_order_type = 'sell' if order_type == 'buy' else 'buy'
         self.logger.info(f"Instance {instance_index}: Flipping order type from {order_type} to {new_order_type}")
         # Remove the executed order so a new order can be placed in the next cycle.
-        if instance_index in self.state.active_orders:
-            del self.state.active_orders[instance_index]
+        self._drop_order(instance_index)
 
     def recover_state(self, instance_index=None):
         """
@@ -156,20 +242,27 @@ class ParallelOrderManager:
         if instance_index is not None:
             order_state = self.state.active_orders.get(instance_index)
             if order_state:
-                order_id = order_state.get('order_id')
-                try:
-                    if self.api.cancel_order(order_id):
-                        self.logger.info(f"Instance {instance_index}: Order {order_id} cancelled during recovery.")
-                    else:
-                        self.logger.error(f"Instance {instance_index}: Failed to cancel order {order_id} during recovery.")
-                except Exception as e:
-                    self.logger.error(f"Instance {instance_index}: Recovery error: {str(e)}")
-                del self.state.active_orders[instance_index]
+                self._recover_order(instance_index, order_state.order_id)
+                self._drop_order(instance_index)
         else:
-            for idx in list(self.state.active_orders.keys()):
-                self.recover_state(idx)
+            with self._orders_lock:
+                orders = tuple(self.state.active_orders.items())
+            for idx, order_state in orders:
+                self._recover_order(idx, order_state.order_id)
+            with self._orders_lock:
+                for idx, _ in orders:
+                    self._drop_locked(idx)
         self.logger.info("Recovery of parallel orders completed.")
 
+    def _recover_order(self, instance_index, order_id):
+        try:
+            if self.api.cancel_order(order_id):
+                self.logger.info(f"Instance {instance_index}: Order {order_id} cancelled during recovery.")
+            else:
+                self.logger.error(f"Instance {instance_index}: Failed to cancel order {order_id} during recovery.")
+        except Exception as e:
+            self.logger.error(f"Instance {instance_index}: Recovery error: {str(e)}")
+
     def graceful_shutdown(self):
         """
         Gracefully shutdown bot-managed orders.
@@ -178,49 +271,53 @@ class ParallelOrderManager:
         """
         self.logger.info("Initiating graceful shutdown of bot-managed orders...")
         
+        # Snapshot under the lock, then cancel and sell without holding it so the WS thread
+        # is never stuck behind a REST round trip.
+        with self._orders_lock:
+            buy_orders = [(instance_index, order_state)
+                          for instance_index, order_state in self.state.active_orders.items()
+                          if order_state.order_type == 'buy']
+            # The sell index is already in ascending limit-price order.
+            sell_orders = [(instance_index, self.state.active_orders[instance_index])
+                           for _, instance_index in self._sell_index]
+        
         # Process buy orders: cancel them instantly.
-        for instance_index, order_state in list(self.state.active_orders.items()):
-            if order_state.get('order_type') == 'buy':
-                order_id = order_state.get('order_id')
-                self.logger.info(f"Instance {instance_index}: Cancelling bot-placed buy order {order_id}")
-                try:
-                    self.api.cancel_order(order_id)
-                except Exception as e:
-                    self.logger.error(f"Instance {instance_index}: Failed to cancel buy order {order_id}: {e}")
-                del self.state.active_orders[instance_index]
+        for instance_index, order_state in buy_orders:
+            order_id = order_state.order_id
+            self.logger.info(f"Instance {instance_index}: Cancelling bot-placed buy order {order_id}")
+            try:
+                self.api.cancel_order(order_id)
+            except Exception as e:
+                self.logger.error(f"Instance {instance_index}: Failed to cancel buy order {order_id}: {e}")
         
         # Process sell orders: cancel and replace with market orders sequentially.
-        sell_orders = []
-        for instance_index, order_state in self.state.active_orders.items():
-            if order_state.get('order_type') == 'sell':
-                sell_orders.append((instance_index, order_state))
-        
-        if sell_orders:
-            # Sort sell orders by their stored limit price in ascending order.
-            sell_orders.sort(key=lambda x: x[1].get('limit_price', float('inf')))
-            for instance_index, order_state in sell_orders:
-                order_id = order_state.get('order_id')
-                limit_price = order_state.get('limit_price')
-                self.logger.info(f"Instance {instance_index}: Processing sell order {order_id} with limit price {limit_price}")
-                try:
-                    if self.api.cancel_order(order_id):
-                        self.logger.info(f"Instance {instance_index}: Cancelled sell order {order_id}")
-                        # Retrieve the amount to sell; using executed_amount stored from buy execution.
-                        amount = order_state.get('executed_amount')
-                        if not amount or amount <= 0:
-                            self.logger.error(f"Instance {instance_index}: No valid executed amount to sell; skipping market order.")
-                        else:
-                            market_order = self.api.place_market_order('sell', amount)
-                            if market_order:
-                                self.logger.info(f"Instance {instance_index}: Market sell order placed: {market_order}")
-                            else:
-                                self.logger.error(f"Instance {instance_index}: Failed to place market sell order.")
+        for instance_index, order_state in sell_orders:
+            order_id = order_state.order_id
+            limit_price = order_state.limit_price
+            self.logger.info(f"Instance {instance_index}: Processing sell order {order_id} with limit price {limit_price}")
+            try:
+                if self.api.cancel_order(order_id):
+                    self.logger.info(f"Instance {instance_index}: Cancelled sell order {order_id}")
+                    # Retrieve the amount to sell; using executed_amount stored from buy execution.
+                    amount = order_state.executed_amount
+                    if not amount or amount <= 0:
+                        self.logger.error(f"Instance {instance_index}: No valid executed amount to sell; skipping market order.")
                     else:
-                        self.logger.error(f"Instance {instance_index}: Failed to cancel sell order {order_id}.")
-                except Exception as e:
-                    self.logger.error(f"Instance {instance_index}: Error during processing sell order: {e}")
-                finally:
-                    if instance_index in self.state.active_orders:
-                        del self.state.active_orders[instance_index]
+                        market_order = self.api.place_market_order('sell', amount)
+                        if market_order:
+                            self.logger.info(f"Instance {instance_index}: Market sell order placed: {market_order}")
+                        else:
+                            self.logger.error(f"Instance {instance_index}: Failed to place market sell order.")
+                else:
+                    self.logger.error(f"Instance {instance_index}: Failed to cancel sell order {order_id}.")
+            except Exception as e:
+                self.logger.error(f"Instance {instance_index}: Error during processing sell order: {e}")
+        
+        # Every visited order is done with, whatever the outcome.
+        with self._orders_lock:
+            for instance_index, _ in buy_orders:
+                self._drop_locked(instance_index)
+            for instance_index, _ in sell_orders:
+                self._drop_locked(instance_index)
         
         self.logger.info("Graceful shutdown complete. All bot-managed orders have been processed.")
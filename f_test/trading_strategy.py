@@ -1,6 +1,7 @@
 import time
 import math
 import logging
+import threading
 from gateio_api import GateIOAPIClient
 from gateio_websocket import GateIOWebSocketClient
 from order_manager import OrderManager
@@ -9,17 +10,34 @@ from parallel_order_manager import ParallelOrderManager  # New module for parall
 class OrderState:
     def __init__(self):
         # For parallel orders, active_orders stores per-instance order details (e.g. order_id, last_price, limit_price)
-        self.active_orders = {}   # key: instance_index, value: dict with order details
+        self.active_orders = {}   # key: instance_index, value: OrderRecord
         self.order_type = 'buy'   # Starting order type
         self.last_buy_amount = None  # To store executed buy amount (for sell orders)
 
+def _leading_digit(n):
+    """Return (leading decimal digit, its place value) for a positive integer."""
+    power = 10 ** int(math.log10(n))
+    # log10 can land one off either side of an exact power of ten
+    if power > n:
+        power //= 10
+    elif power * 10 <= n:
+        power *= 10
+    return n // power, power
+
 class TradingStrategy:
     def __init__(self, config):
         self.config = config
         self.api = GateIOAPIClient(config)
         self.state = OrderState()
         self.logger = logging.getLogger("TradingStrategy")
+        # Read once; logging is configured before the strategy is built
+        self._dbg = self.logger.isEnabledFor(logging.DEBUG)
         self.current_price = None
+        self._price_ready = threading.Event()
+        # Wakes manage_strategy on fills and on prices that can trigger a cancel/replace
+        self._tick_event = threading.Event()
+        self._buy_wake = -math.inf   # prices below the highest buy order's last_price
+        self._sell_wake = math.inf   # prices above the lowest sell order's last_price
 
         # Initialize WebSocket client with callbacks for price and order events
         self.ws_client = GateIOWebSocketClient(
@@ -27,7 +45,9 @@ class TradingStrategy:
             on_price_callback=self.update_price,
             on_order_callback=self.on_order_event,
             api_key=self.config['api']['key'],
-            api_secret=self.config['api']['secret']
+            api_secret=self.config['api']['secret'],
+            busy_poll_us=self.config['api'].get('ws_busy_poll_us'),
+            cpu_affinity=self.config['api'].get('ws_cpu')
         )
         self.ws_client.start()
         self.logger.info("WebSocket client started. Fetching initial market price...")
@@ -41,6 +61,12 @@ class TradingStrategy:
         else:
             price_precision = self.config['trading'].get('fallback_price_precision')
         self.tick_size = 10 ** (-price_precision)
+        # Fixed for the session: resolve rounding precision and offsets once, not per price calculation
+        self._decimal_places = -int(math.log10(self.tick_size))
+        self._buy_trigger_base = self.config['trading']['buy']['trigger_price_adjust']
+        self._buy_limit_base = self.config['trading']['buy']['limit_price_adjust']
+        self._sell_trigger_base = self.config['trading']['sell']['trigger_price_adjust']
+        self._sell_limit_base = self.config['trading']['sell']['limit_price_adjust']
         self.logger.info(f"Determined tick size: {self.tick_size} (precision: {price_precision} digits)")
 
         # Determine the number of parallel order instances (fixed or dynamic)
@@ -62,7 +88,11 @@ class TradingStrategy:
 
     def update_price(self, price):
         self.current_price = price
-        self.logger.debug(f"Price updated via callback: {price}")
+        self._price_ready.set()
+        if price < self._buy_wake or price > self._sell_wake:
+            self._tick_event.set()
+        if self._dbg:
+            self.logger.debug("Price updated via callback: %s", price)
 
     def on_order_event(self, event):
         """
@@ -70,10 +100,13 @@ class TradingStrategy:
         Dispatches the event to the appropriate parallel instance based on order_id.
         """
         order_id = event.get('order_id')
-        self.logger.debug(f"Order event received: {event}")
+        if self._dbg:
+            self.logger.debug("Order event received: %s", event)
+        self._tick_event.set()
         # Identify the instance (if any) that matches this order_id
-        for instance_index, order_state in self.state.active_orders.items():
-            if order_state.get('order_id') == order_id:
+        # Snapshot: replacement threads can add entries while this WS callback runs
+        for instance_index, order_state in tuple(self.state.active_orders.items()):
+            if order_state.order_id == order_id:
                 self.logger.info(f"Instance {instance_index}: Order {order_id} executed. Processing execution event.")
                 self.parallel_order_manager.handle_order_execution(instance_index, event)
                 break
@@ -84,35 +117,32 @@ class TradingStrategy:
         the order type, and the branch (instance) index. Each subsequent instance increases
         the offsets by 1 tick.
         """
-        self.logger.debug(f"Calculating prices for {order_type} order with last price: {last_price} for instance {instance_index}")
+        if self._dbg:
+            self.logger.debug("Calculating prices for %s order with last price: %s for instance %d",
+                              order_type, last_price, instance_index)
         tick_size = self.tick_size
         if order_type == 'buy':
-            base_trigger = self.config['trading']['buy']['trigger_price_adjust']
-            base_limit = self.config['trading']['buy']['limit_price_adjust']
-            trigger = last_price + ((base_trigger + instance_index) * tick_size)
-            limit = last_price + ((base_limit + instance_index) * tick_size)
+            trigger = last_price + ((self._buy_trigger_base + instance_index) * tick_size)
+            limit = last_price + ((self._buy_limit_base + instance_index) * tick_size)
         elif order_type == 'sell':
-            base_trigger = self.config['trading']['sell']['trigger_price_adjust']
-            base_limit = self.config['trading']['sell']['limit_price_adjust']
-            trigger = last_price - ((base_trigger + instance_index) * tick_size)
-            limit = last_price - ((base_limit + instance_index) * tick_size)
+            trigger = last_price - ((self._sell_trigger_base + instance_index) * tick_size)
+            limit = last_price - ((self._sell_limit_base + instance_index) * tick_size)
         else:
             raise ValueError("Invalid order type specified")
-        decimal_places = -int(math.log10(tick_size))
-        trigger = round(trigger, decimal_places)
-        limit = round(limit, decimal_places)
-        self.logger.debug(f"Instance {instance_index}: Calculated trigger: {trigger}, limit: {limit}")
+        trigger = round(trigger, self._decimal_places)
+        limit = round(limit, self._decimal_places)
+        if self._dbg:
+            self.logger.debug("Instance %d: Calculated trigger: %s, limit: %s", instance_index, trigger, limit)
         return trigger, limit
 
     def _get_market_price(self):
-        self.logger.debug("Fetching current market price...")
-        start_time = time.time()
-        while self.current_price is None:
-            if time.time() - start_time > 5:
-                self.logger.error("No price update received from WebSocket within 5 seconds.")
-                break
-            time.sleep(0.01)
-        self.logger.debug(f"Current market price is: {self.current_price}")
+        if self._dbg:
+            self.logger.debug("Fetching current market price...")
+        # Wakes as soon as update_price delivers the first tick instead of polling
+        if self.current_price is None and not self._price_ready.wait(timeout=5):
+            self.logger.error("No price update received from WebSocket within 5 seconds.")
+        if self._dbg:
+            self.logger.debug("Current market price is: %s", self.current_price)
         return self.current_price
 
     def _determine_instances(self, current_price):
@@ -126,17 +156,34 @@ class TradingStrategy:
         fixed_instances = self.config['trading'].get('parallel_instances')
         if fixed_instances:
             return fixed_instances
-        price_str = f"{current_price:.8f}"
-        digits = [c for c in price_str if c.isdigit() and c != '0']
-        if len(digits) < 2:
-            significant = float(price_str)
+        # Work on the price's digits at 8-decimal resolution as an integer; zeros are skipped,
+        # so 0.0004567 -> 4.5 and 105.3 -> 1.5
+        scaled = round(round(current_price, 8) * 100000000)
+        if scaled <= 0:
+            significant = 0.0
         else:
-            significant = float(f"{digits[0]}.{digits[1]}")
+            first, power = _leading_digit(scaled)
+            rest = scaled - first * power
+            if rest == 0:
+                significant = scaled / 100000000
+            else:
+                significant = first + _leading_digit(rest)[0] / 10
         multiplier = self.config['trading'].get('dynamic_multiplier', 24)
         product = significant * multiplier
         instances = int(product) if product == int(product) else int(product) + 1
         return instances
 
+    def _refresh_wake_thresholds(self):
+        # Mirrors the monitor_active_orders conditions: a buy is replaced once the price drops
+        # below its last_price, a sell once it rises above it
+        buy_wake, sell_wake = -math.inf, math.inf
+        for order_state in list(self.state.active_orders.values()):
+            if order_state.order_type == 'buy':
+                buy_wake = max(buy_wake, order_state.last_price)
+            elif order_state.order_type == 'sell':
+                sell_wake = min(sell_wake, order_state.last_price)
+        self._buy_wake, self._sell_wake = buy_wake, sell_wake
+
     def manage_strategy(self):
         trade_count = 0
         max_trades = self.config['trading'].get('trade_limit')
@@ -160,7 +207,10 @@ class TradingStrategy:
                         self._get_market_price,
                         self._calculate_prices
                     )
-                time.sleep(self.config['trading']['price_poll_interval'])
+                self._refresh_wake_thresholds()
+                # Sleep until a fill or a crossing price arrives; the poll interval is only a fallback
+                self._tick_event.wait(timeout=self.config['trading']['price_poll_interval'])
+                self._tick_event.clear()
                 trade_count += 1
             except KeyboardInterrupt:
                 self.logger.info("Stopped by user")
@@ -1,5 +1,5 @@
 import time
-import json
+import orjson
 import hmac
 import hashlib
 import websocket  # install via `pip install websocket-client`
@@ -10,17 +10,21 @@ API_SECRET = "4217aba9cdca23d475b2df22302b934274e022d7c555f192f2ea9cadd9f320a4".
 WS_URL = "wss://ws.gate.io/v4/"  # Using the API v4 WebSocket endpoint for spot
 
 # --- Helper: Create signature ---
-def create_signature(secret, channel, event, ts):
+# Keyed once; each signature copies the precomputed inner/outer SHA-512 states
+HMAC_TEMPLATE = hmac.new(API_SECRET, digestmod=hashlib.sha512)
+
+def create_signature(channel, event, ts):
     message = f"channel={channel}&event={event}&time={ts}"
-    signature = hmac.new(secret, message.encode('utf-8'), hashlib.sha512).hexdigest()
-    return signature
+    mac = HMAC_TEMPLATE.copy()
+    mac.update(message.encode('utf-8'))
+    return mac.hexdigest()
 
 # --- Build amend order request ---
 def build_amend_request(order_id, new_price, new_size):
     ts = int(time.time() * 1000)  # current time in milliseconds
     channel = "order.amend"   # the method name for amending an order
     event = "api"           # using "api" event for request
-    signature = create_signature(API_SECRET, channel, event, ts)
+    signature = create_signature(channel, event, ts)
     
     # Assemble the request payload. (Note: The actual parameter names may vary;
     # this example follows the general format documented by Gate.io.)
@@ -42,7 +46,7 @@ def build_amend_request(order_id, new_price, new_size):
 
 def on_message(ws, message):
     print("Received:")
-    print(json.dumps(json.loads(message), indent=2))
+    print(orjson.dumps(orjson.loads(message), option=orjson.OPT_INDENT_2).decode())
     # Close after receiving the response
     ws.close()
 
@@ -59,8 +63,9 @@ def on_open(ws):
     new_size = "100"      # arbitrary new size
     amend_req = build_amend_request(fake_order_id, new_price, new_size)
     print("Sending amend request:")
-    print(json.dumps(amend_req, indent=2))
-    ws.send(json.dumps(amend_req))
+    frame = orjson.dumps(amend_req)
+    print(orjson.dumps(amend_req, option=orjson.OPT_INDENT_2).decode())
+    ws.send(frame)
 
 if __name__ == "__main__":
     ws = websocket.WebSocketApp(WS_URL,
@@ -1,4 +1,5 @@
 import ccxt
+from ccxt.base.decimal_to_precision import decimal_to_precision, TRUNCATE
 import logging
 
 class GateIOAPIClient:
@@ -14,9 +15,23 @@ class GateIOAPIClient:
             'secret': self.secret,
             'enableRateLimit': True,
         })
+        # Resolve market and precision settings once instead of per order
+        self.exchange.load_markets()
+        self._amount_precision = self.exchange.market(self.symbol)['precision']['amount']
+        self._precision_mode = self.exchange.precisionMode
+        self._padding_mode = self.exchange.paddingMode
         self.logger = logging.getLogger("GateIOAPIClient")
         self.logger.info(f"Initialized API client for {self.symbol}")
 
+    def _amount_to_precision(self, amount):
+        result = decimal_to_precision(
+            amount, TRUNCATE, self._amount_precision,
+            self._precision_mode, self._padding_mode
+        )
+        if result == '0':
+            raise ValueError(f"Amount {amount} is below the market's amount precision.")
+        return result
+
     def get_open_orders(self):
         self.logger.debug("Fetching open orders...")
         try:
@@ -83,9 +98,7 @@ class GateIOAPIClient:
                 self.logger.error("Invalid order amount calculated; order will not be placed.")
                 return None
 
-            market = self.exchange.market(self.symbol)
-            precision = market['precision']['amount']
-            amount = self.exchange.amount_to_precision(self.symbol, amount)
+            amount = self._amount_to_precision(amount)
             self.logger.debug(f"Formatted amount: {amount}")
 
             params = {